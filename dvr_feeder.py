@@ -21,6 +21,8 @@ import os
 import signal
 import argparse
 import logging
+import queue
+import threading
 import time
 
 # Add parent directory to path for the hieasy_dvr package
@@ -30,6 +32,70 @@ from hieasy_dvr import DVRClient
 
 log = logging.getLogger('dvr_feeder')
 
+STDOUT_BATCH_SIZE = 64 * 1024    # max bytes gathered per writev() to ffmpeg
+STREAM_QUEUE_SIZE = 64            # chunks buffered between reader and writer
+MEDIA_RCVBUF = 8 * 1024 * 1024    # lets the DVR push larger bursts per window
+MAX_RETRIES = 15
+STOP_POLL = 0.5                   # s — longest a signal waits while the stream is idle
+
+
+def _retry_delay(attempt):
+    """
+    Seconds to wait before reconnect attempt N (1-based).
+
+    The DVR sits on the same LAN, so drops are almost always sub-second
+    blips: retry immediately, then on short fixed tiers instead of an
+    exponential backoff that throws away live-view seconds.
+    """
+    if attempt <= 1:
+        return 0
+    if attempt <= 3:
+        return 0.25
+    if attempt <= 6:
+        return 1.0
+    return 5.0
+
+
+_STREAM_END = object()
+
+
+def _pump_stream(dvr, q):
+    """
+    Reader thread: drain the DVR media socket into *q* so the TCP window
+    stays open even while ffmpeg's pipe is briefly full. Ends with
+    _STREAM_END, or the exception that stopped the stream.
+    """
+    try:
+        for _codec, h264_data in dvr.stream():
+            q.put(h264_data)
+        q.put(_STREAM_END)
+    except BaseException as e:
+        q.put(e)
+
+
+def _write_all(fd, buffers):
+    """
+    Write a list of byte buffers to fd with as few syscalls as possible.
+    Uses scatter-gather os.writev() where available (no user-space join),
+    resuming after short writes. Clears *buffers* when done.
+    """
+    if not hasattr(os, 'writev'):
+        data = memoryview(b''.join(buffers))
+        while data:
+            data = data[os.write(fd, data):]
+        buffers.clear()
+        return
+    bufs = [memoryview(b) for b in buffers]
+    while bufs:
+        n = os.writev(fd, bufs)
+        # Drop fully written buffers, slice a partially written one
+        while bufs and n >= len(bufs[0]):
+            n -= len(bufs[0])
+            bufs.pop(0)
+        if n:
+            bufs[0] = bufs[0][n:]
+    buffers.clear()
+
 
 def main():
     parser = argparse.ArgumentParser(description='DVR H.264 stream feeder')
@@ -56,6 +122,12 @@ def main():
         format='%(asctime)s %(name)s %(levelname)s %(message)s',
         stream=sys.stderr,
     )
+    # Skip the stack walk that records caller file/line for every log record
+    # (see "Optimization" in the logging docs); the format doesn't use them.
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
     dvr = DVRClient(
         host=args.host,
@@ -63,36 +135,69 @@ def main():
         media_port=args.media_port,
         username=args.username,
         password=args.password,
+        media_rcvbuf=MEDIA_RCVBUF,
     )
 
+    # Gather whatever NAL chunks are queued and hand them to ffmpeg in one
+    # writev() per batch.
+    stdout_fd = sys.stdout.fileno()
+    pending = []
+
+    stop = []   # signal number, set by shutdown()
+
     def shutdown(sig, frame):
-        log.info("Signal %d received, disconnecting...", sig)
-        dvr.disconnect()
-        sys.exit(0)
+        # Only record it: the main loop may be in the middle of a writev()
+        # on `pending`, and flushing from here would resend written bytes.
+        # The loop finishes its current write, then exits.
+        stop.append(sig)
 
     signal.signal(signal.SIGTERM, shutdown)
     signal.signal(signal.SIGINT, shutdown)
 
-    MAX_RETRIES = 5
-    RETRY_BASE = 3          # seconds
     retry_count = 0
 
-    while True:
+    while not stop:
         try:
             dvr.connect(channel=args.channel, stream_type=args.stream_type)
             log.info("Streaming channel %d to stdout...", args.channel)
             retry_count = 0     # connected OK — reset backoff
 
-            stdout = sys.stdout.buffer
-            for _codec, h264_data in dvr.stream():
-                try:
-                    stdout.write(h264_data)
-                    stdout.flush()
-                except BrokenPipeError:
-                    log.info("Stdout pipe broken — reader disconnected")
-                    dvr.disconnect()
-                    return
-
+            q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+            threading.Thread(target=_pump_stream, args=(dvr, q),
+                             daemon=True, name='dvr-reader').start()
+            try:
+                # Hot loop (every NAL chunk): keep log calls out of it. Any
+                # diagnostics must be gated on log.isEnabledFor(logging.DEBUG).
+                ended = False
+                while not ended and not stop:
+                    try:
+                        item = q.get(timeout=STOP_POLL)
+                    except queue.Empty:
+                        continue
+                    pending_bytes = 0
+                    while True:
+                        if item is _STREAM_END:
+                            ended = True
+                            break
+                        if isinstance(item, BaseException):
+                            _write_all(stdout_fd, pending)
+                            raise item
+                        pending.append(item)
+                        pending_bytes += len(item)
+                        if pending_bytes >= STDOUT_BATCH_SIZE:
+                            break
+                        try:
+                            item = q.get_nowait()
+                        except queue.Empty:
+                            break
+                    _write_all(stdout_fd, pending)
+            except BrokenPipeError:
+                log.info("Stdout pipe broken — reader disconnected")
+                dvr.disconnect()
+                return
+
+            if stop:
+                break
             # stream() ended normally (DVR closed connection)
             log.warning("Stream ended for channel %d", args.channel)
 
@@ -104,13 +209,17 @@ def main():
             if retry_count > MAX_RETRIES:
                 log.error("Giving up after %d retries: %s", MAX_RETRIES, e)
                 sys.exit(1)
-            delay = min(RETRY_BASE * (2 ** (retry_count - 1)), 30)
-            log.warning("Connection error (attempt %d/%d): %s — retrying in %ds",
+            delay = _retry_delay(retry_count)
+            log.warning("Connection error (attempt %d/%d): %s — retrying in %gs",
                         retry_count, MAX_RETRIES, e, delay)
-            time.sleep(delay)
+            if delay:
+                time.sleep(delay)
         finally:
             dvr.disconnect()
 
+    if stop:
+        log.info("Signal %d received, disconnected", stop[0])
+
 
 if __name__ == '__main__':
     main()
@@ -19,7 +19,8 @@ Endpoints:
   /api/recordings/<ch>/<f>  → DELETE: delete a single recording file
   /api/recordings/delete-all → POST: delete all recordings
   /api/recordings/download/<ch>/<file> → Download a recording
-  /api/dvr/discover         → GET: probe network for DVRs (probe=1 to force)
+  /api/dvr/discover         → GET: last-known DVR; probe=1 (or POST) starts a scan
+  /api/dvr/discover/<id>    → GET: result of a background scan
   /api/gdrive/status        → GET: OAuth config + connection status
   /api/gdrive/config        → POST: save client_id, client_secret, folder_id
   /api/gdrive/connect       → POST: start device-flow auth
@@ -28,19 +29,41 @@ Endpoints:
   /<static files>           → Files from web/ directory
 
 Port: $DVR_WEB_PORT (default 8080)
+
+Set DVR_WEB_GEVENT=true (requires `pip3 install gevent`) to serve requests
+on cooperative greenlets instead of one OS thread per connection.
 """
 
 import os
 import sys
+
+# Must run before anything else imports socket/threading
+if os.environ.get('DVR_WEB_GEVENT', '').lower() in ('true', '1', 'yes'):
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+    except ImportError:
+        sys.stderr.write('[dvr] DVR_WEB_GEVENT set but gevent is not installed '
+                         '— using OS threads\n')
+
 import json
 import time
+import queue
 import signal
 import http.server
 import threading
 import subprocess
 import logging
+import gzip
+import hashlib
 import mimetypes
 import urllib.parse
+import re
+import socket
+import itertools
+import functools
+import stat
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -48,12 +71,20 @@ logging.basicConfig(
     level=logging.INFO,
     format='[%(name)s] %(message)s',
 )
+log = logging.getLogger('dvr')
+
+try:
+    import orjson   # optional: much faster encoder (pip3 install orjson)
+except ImportError:
+    orjson = None
 
 from hieasy_dvr.config import DVRConfigClient, CONFIG_TYPES
 from hieasy_dvr.recorder import RecordingScheduler
 from hieasy_dvr import discover as _discover_mod
 
 PORT = int(os.environ.get('DVR_WEB_PORT', 8080))
+# Request-handling threads; each kept-alive browser connection holds one
+HTTP_WORKERS = max(1, int(os.environ.get('DVR_WEB_THREADS', 32)))
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 WEB_DIR = os.path.join(BASE_DIR, 'web')
 CACHE_DIR = os.path.join(BASE_DIR, 'cache')
@@ -70,12 +101,11 @@ def _load_persisted_recording_config():
         with open(RECORDING_CONFIG_PATH) as f:
             saved = json.load(f)
         _recorder.update_config(saved)
-        logging.getLogger('dvr').info('Loaded saved recording config from %s',
-                                      RECORDING_CONFIG_PATH)
+        log.info('Loaded saved recording config from %s', RECORDING_CONFIG_PATH)
     except FileNotFoundError:
         pass
     except Exception as e:
-        logging.getLogger('dvr').warning('Could not load recording config: %s', e)
+        log.warning('Could not load recording config: %s', e)
 
 _load_persisted_recording_config()
 
@@ -83,52 +113,260 @@ _load_persisted_recording_config()
 
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-_dvr_client = None
-_dvr_lock = threading.Lock()       # serializes all DVR access
-_config_cache = {}                 # mc → (data, timestamp)
+# Max concurrent DVR config connections (each one is a separate DVR login)
+_DVR_POOL_SIZE = max(1, int(os.environ.get('DVR_WEB_POOL_SIZE', 4)))
+# LIFO so the most recently used (warm) connection is handed out first
+_dvr_pool = queue.LifoQueue(maxsize=_DVR_POOL_SIZE)
+for _ in range(_DVR_POOL_SIZE):
+    _dvr_pool.put(None)            # empty slot — connected lazily
+# Shared workers for config fan-out (one per pooled connection)
+_dvr_executor = ThreadPoolExecutor(max_workers=_DVR_POOL_SIZE,
+                                   thread_name_prefix='dvr-cfg')
+_config_cache = {}                 # mc → (data, body, gzip_body, etag, timestamp)
+_all_configs_cache = None          # (body, gzip_body, etag, timestamp) for /api/config
+_config_errors = {}                # mc → (error message, timestamp)
+_connect_error = None              # (error message, timestamp) of last failed connect
+_inflight = {}                     # mc → threading.Event set when its DVR query ends
+_INFLIGHT_WAIT = 30                # seconds a coalesced caller waits for the fetcher
+_refreshing = set()                # mcs with a stale-while-revalidate refresh queued
+# Own workers so a refresh never queues behind fan-out tasks waiting on it
+_refresh_executor = ThreadPoolExecutor(max_workers=2,
+                                       thread_name_prefix='dvr-refresh')
 _cache_lock = threading.Lock()
-_CACHE_TTL = 30  # seconds (memory)
+_disk_pending = {}                 # mc → encoded config waiting for the disk writer
+_disk_written = {}                 # mc → body last persisted (skip unchanged rewrites)
+_disk_cond = threading.Condition()
+_disk_writer = None                # writer thread, started on first save
+_DISK_FLUSH_DELAY = 1.0            # seconds — coalesce repeated saves of a config
+_CACHE_TTL = 30  # seconds (memory) — default for config types below
+_CACHE_TTLS = {
+    111: 10,       # System Time — shown live on the status panel
+    123: 3600,     # Device Info — model/firmware, read-only
+    127: 120,      # Storage — disk usage moves slowly
+    129: 10,       # Device Status — live channel state (kept warm anyway)
+}
+_STALE_TTL = 300  # seconds past its max age a config is still served while refreshing
+_ERROR_TTL = 3   # seconds — failures are re-raised without touching the DVR
+_ALL_CONFIGS_TTL = 5  # seconds — aggregated /api/config body
+_KEEPALIVE_INTERVAL = 5       # seconds between cache-warming passes
+_KEEPALIVE_RETRY = 60         # seconds to wait after a failed pass
+
+# Network scans run in the background; handlers poll them by probe id
+_probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dvr-probe')
+_probe_jobs = {}                   # probe id → Future (most recent few)
+_probe_current = None              # id of the scan queued or running, if any
+_probe_last = None                 # (found IPs, timestamp) of the last finished scan
+_probe_lock = threading.Lock()
+_probe_ids = itertools.count(1)
+_PROBE_TTL = 10    # seconds — repeat probe requests reuse the last scan
+_PROBE_KEEP = 8    # finished probe ids kept for polling
+
+
+def _json_bytes(data):
+    """Encode a compact JSON response body (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(raw):
+    """Parse JSON from bytes (orjson when installed; no decode step)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _etag(body):
+    """Strong ETag for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+_GZIP_MIN_SIZE = 1024  # bytes — smaller bodies aren't worth compressing
+
+
+_GZIP_STORED_LEVEL = 6  # bodies compressed once and cached: squeeze harder
+
+
+def _gzip_body(body, level=1):
+    """
+    gzip a response body. Level 1 (near-free, JSON still shrinks 5-10x)
+    for per-request compression; cached copies pass _GZIP_STORED_LEVEL.
+    """
+    if len(body) < _GZIP_MIN_SIZE:
+        return None
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+# CONFIG_TYPES is static: encode the /api/config-types response once
+_CONFIG_TYPES_BODY = _json_bytes([
+    {'main_cmd': mc, 'name': info['name'],
+     'icon': info['icon'], 'description': info['description']}
+    for mc, info in sorted(CONFIG_TYPES.items())
+])
+_CONFIG_TYPES_GZ = _gzip_body(_CONFIG_TYPES_BODY, _GZIP_STORED_LEVEL)
+_CONFIG_TYPES_ETAG = _etag(_CONFIG_TYPES_BODY)
+
+
+def _write_atomic(path, data):
+    """
+    Write bytes to path in one write and rename into place, so readers
+    never see a truncated file. An existing file's permissions are kept.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    try:
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+    os.replace(tmp, path)
+
+
+_CACHE_PATHS = {mc: os.path.join(CACHE_DIR, f'{mc}.json') for mc in CONFIG_TYPES}
+
+
+def _cache_path(mc):
+    """Disk-cache file for a config type (precomputed for known types)."""
+    return _CACHE_PATHS.get(mc) or os.path.join(CACHE_DIR, f'{mc}.json')
 
 
 def _load_disk_cache(mc):
     """Load a config from disk cache (JSON file)."""
-    path = os.path.join(CACHE_DIR, f'{mc}.json')
+    path = _cache_path(mc)
     try:
-        with open(path, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        with open(path, 'rb') as f:
+            return _json_loads(f.read())
+    except (FileNotFoundError, ValueError):
         return None
 
 
-def _save_disk_cache(mc, data):
-    """Save a config to disk cache."""
-    path = os.path.join(CACHE_DIR, f'{mc}.json')
+def _save_disk_cache(mc, body):
+    """
+    Queue an encoded config for the background disk writer. Only the
+    newest body per config is kept, so bursts of refreshes coalesce.
+    """
+    global _disk_writer
+    with _disk_cond:
+        if _disk_written.get(mc) == body:
+            # Disk already holds this exact copy; drop any older queued one
+            _disk_pending.pop(mc, None)
+            return
+        _disk_pending[mc] = body
+        if _disk_writer is None:
+            _disk_writer = threading.Thread(target=_disk_writer_loop, daemon=True,
+                                            name='dvr-cache-writer')
+            _disk_writer.start()
+        _disk_cond.notify()
+
+
+def _flush_disk_cache():
+    """Write out every queued config now."""
+    with _disk_cond:
+        batch = dict(_disk_pending)
+        _disk_pending.clear()
+    for mc, body in batch.items():
+        try:
+            _write_atomic(_cache_path(mc), body)
+        except OSError:
+            continue
+        _disk_written[mc] = body
+
+
+def _disk_writer_loop():
+    """Background thread: persist queued configs off the request path."""
+    while True:
+        with _disk_cond:
+            while not _disk_pending:
+                _disk_cond.wait()
+        time.sleep(_DISK_FLUSH_DELAY)   # let a burst of refreshes coalesce
+        _flush_disk_cache()
+
+
+def _cached_entry(mc, data):
+    """Build a cache entry for a config served from the disk copy."""
+    data['_cached'] = True
+    _enrich(mc, data)
+    body = _json_bytes(data)
+    return data, body, _gzip_body(body, _GZIP_STORED_LEVEL), _etag(body)
+
+
+def _warm_cache():
+    """
+    Load every disk-cached config into memory at startup. Entries are
+    stamped with time 0 so the first request still goes to the DVR, but
+    if it is unreachable the fallback is served from RAM.
+    """
     try:
-        with open(path, 'w') as f:
-            json.dump(data, f, ensure_ascii=False)
+        names = os.listdir(CACHE_DIR)
     except OSError:
-        pass
+        return
+    loaded = 0
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext != '.json' or not stem.isdigit():
+            continue
+        mc = int(stem)
+        if mc not in CONFIG_TYPES:
+            continue
+        data = _load_disk_cache(mc)
+        if not isinstance(data, dict):
+            continue
+        with _cache_lock:
+            _config_cache.setdefault(mc, _cached_entry(mc, data) + (0.0,))
+        loaded += 1
+    if loaded:
+        log.info('Warmed %d cached configs from %s', loaded, CACHE_DIR)
 
 
-def _ensure_client():
-    """Ensure a connected DVR client exists. Must hold _dvr_lock."""
-    global _dvr_client
-    if _dvr_client is not None and _dvr_client._sock is not None:
-        return
-    if _dvr_client:
-        _dvr_client.close()
-    _dvr_client = DVRConfigClient()
+def _connect_client():
+    """Open and log in a new DVR config client, re-probing the LAN on failure."""
+    client = DVRConfigClient()
     try:
-        _dvr_client.connect()
+        client.connect()
     except Exception:
-        _dvr_client = None
-        # Try to rediscover the DVR on the network before giving up
-        found = _probe_for_dvr()
-        if found:
-            _dvr_client = DVRConfigClient()
-            _dvr_client.connect()  # raises on failure; caller handles it
-        else:
+        client.close()
+        # Try to rediscover the DVR on the network before giving up.
+        # Concurrent failures share one scan (and a recent one's answer).
+        found = _probe_wait()
+        if not found:
             raise
+        client = DVRConfigClient()
+        client.connect()  # raises on failure; caller handles it
+    return client
+
+
+def _acquire_client():
+    """Take a connected client from the pool (blocks while all are busy)."""
+    global _connect_error
+    client = _dvr_pool.get()
+    if client is not None and client._sock is not None:
+        return client
+    # Don't hammer (and re-probe for) a DVR that just refused us
+    with _cache_lock:
+        failed = _connect_error
+    if failed and time.time() - failed[1] < _ERROR_TTL:
+        _dvr_pool.put(None)
+        raise ConnectionError(failed[0])
+    try:
+        client = _connect_client()
+    except Exception as e:
+        with _cache_lock:
+            _connect_error = (str(e), time.time())
+        _dvr_pool.put(None)
+        raise
+    with _cache_lock:
+        _connect_error = None
+        _config_errors.clear()
+    return client
+
+
+def _release_client(client, broken=False):
+    """Return a client to the pool; broken clients are closed and dropped."""
+    if broken:
+        client.close()
+        client = None
+    _dvr_pool.put(client)
 
 
 def _probe_for_dvr() -> list[str]:
@@ -138,7 +376,6 @@ def _probe_for_dvr() -> list[str]:
     /opt/dvr/dvr.env when running in production).
     Returns the list of found IPs.
     """
-    log = logging.getLogger('dvr')
     log.info('DVR connection failed — probing network for DVR...')
     try:
         found = _discover_mod.discover(timeout=0.6, confirm=True)
@@ -162,109 +399,345 @@ def _probe_for_dvr() -> list[str]:
         # Also update the local .env if present
         _update_env_file(os.path.join(BASE_DIR, '.env'), 'DVR_HOST', new_ip)
         # Invalidate caches so the next request re-queries the new host
-        with _cache_lock:
-            _config_cache.clear()
+        _invalidate()
 
     return found
 
 
+def _run_probe():
+    """Background scan job: remember the result for _PROBE_TTL."""
+    global _probe_last, _probe_current
+    found = None
+    try:
+        found = _probe_for_dvr()
+        return found
+    finally:
+        with _probe_lock:
+            if found is not None:
+                _probe_last = (found, time.time())
+            _probe_current = None
+
+
+def _start_probe():
+    """
+    Start a background network scan, or join the one already running.
+    Returns (probe_id, found): found is the result list when a scan
+    finished within _PROBE_TTL, else None (poll the id for the result).
+    """
+    global _probe_current
+    with _probe_lock:
+        last = _probe_last
+        if last and time.time() - last[1] < _PROBE_TTL and _probe_current is None:
+            return None, last[0]
+        if _probe_current is None:
+            _probe_current = str(next(_probe_ids))
+            _probe_jobs[_probe_current] = _probe_executor.submit(_run_probe)
+            while len(_probe_jobs) > _PROBE_KEEP:
+                del _probe_jobs[next(iter(_probe_jobs))]
+        return _probe_current, None
+
+
+def _probe_wait():
+    """Start or join a network scan via _start_probe() and wait for its result."""
+    probe_id, found = _start_probe()
+    if probe_id is None:
+        return found
+    with _probe_lock:
+        fut = _probe_jobs.get(probe_id)
+    try:
+        return fut.result() if fut is not None else []
+    except Exception:
+        return []
+
+
+def _invalidate(main_cmd=None, disk=False):
+    """
+    Drop a cached config (or all of them when main_cmd is None) so the
+    next request re-queries the DVR. With disk=True the on-disk fallback
+    copy is removed as well.
+    """
+    global _all_configs_cache
+    with _cache_lock:
+        if main_cmd is None:
+            keys = list(_config_cache)
+            _config_cache.clear()
+            _config_errors.clear()
+        else:
+            keys = [main_cmd]
+            _config_cache.pop(main_cmd, None)
+            _config_errors.pop(main_cmd, None)
+        _all_configs_cache = None
+    if disk:
+        for mc in keys:
+            try:
+                os.remove(_cache_path(mc))
+            except FileNotFoundError:
+                pass
+
+
 def _update_env_file(path: str, key: str, value: str) -> None:
     """Update or append key=value in an .env style file."""
     if not os.path.isfile(path):
         return
+    prefix = f'{key}='
+    entry = f'{key}={value}\n'
     try:
         with open(path) as f:
             lines = f.readlines()
         new_lines = []
-        found = False
+        found = changed = False
         for line in lines:
-            if line.startswith(f'{key}='):
-                new_lines.append(f'{key}={value}\n')
+            if line.startswith(prefix):
                 found = True
-            else:
-                new_lines.append(line)
+                if line != entry:
+                    line = entry
+                    changed = True
+            new_lines.append(line)
         if not found:
-            new_lines.append(f'{key}={value}\n')
-        with open(path, 'w') as f:
-            f.writelines(new_lines)
+            if new_lines and not new_lines[-1].endswith('\n'):
+                new_lines[-1] += '\n'
+            new_lines.append(entry)
+            changed = True
+        if changed:
+            _write_atomic(path, ''.join(new_lines).encode())
     except OSError:
         pass
 
 
-def _get_config(main_cmd):
-    """Get a single config from DVR with memory + disk caching."""
-    global _dvr_client
-    now = time.time()
+def _enrich(main_cmd, data):
+    """Attach the CONFIG_TYPES display metadata to a config dict."""
     info = CONFIG_TYPES.get(main_cmd, {})
+    data['type_name'] = info.get('name', f'Config {main_cmd}')
+    data['type_icon'] = info.get('icon', '📋')
+    data['type_description'] = info.get('description', '')
+    return data
 
-    def _enrich(data):
-        data['type_name'] = info.get('name', f'Config {main_cmd}')
-        data['type_icon'] = info.get('icon', '📋')
-        data['type_description'] = info.get('description', '')
-        return data
 
-    # 1. Check memory cache
+def _fetch_config(main_cmd):
+    """
+    Query one config from the DVR on a pooled connection and cache it.
+    Returns (data, body, gzip_body, etag); raises if the DVR can't be reached.
+    """
+    for attempt in range(2):
+        client = None
+        try:
+            client = _acquire_client()
+            data = client.get_config(main_cmd)
+        except Exception as e:
+            if client is None:
+                raise   # connect failed; a retry would hit the negative cache
+            # Socket errors mean the connection is dead (typically a pooled
+            # one the DVR dropped): retry once on a fresh one. A reply we
+            # couldn't parse leaves the stream in sync, so keep it.
+            _release_client(client, broken=isinstance(e, OSError))
+            if attempt == 1:
+                raise
+            continue
+        _release_client(client)
+        _enrich(main_cmd, data)
+        body = _json_bytes(data)
+        gz = _gzip_body(body, _GZIP_STORED_LEVEL)
+        etag = _etag(body)
+        with _cache_lock:
+            _config_cache[main_cmd] = (data, body, gz, etag, time.time())
+            _config_errors.pop(main_cmd, None)
+        _save_disk_cache(main_cmd, body)   # body is the encoded (enriched) data
+        return data, body, gz, etag
+
+
+def _fetch_config_coalesced(main_cmd):
+    """
+    _fetch_config, but concurrent misses for the same config share one DVR
+    query: the first caller fetches, the others wait for it and then read
+    its result (or its error) from the cache.
+    """
+    with _cache_lock:
+        done = _inflight.get(main_cmd)
+        leader = done is None
+        if leader:
+            done = _inflight[main_cmd] = threading.Event()
+
+    if not leader:
+        if not done.wait(_INFLIGHT_WAIT):
+            raise TimeoutError(f'Timed out waiting for DVR config {main_cmd}')
+        with _cache_lock:
+            entry = _config_cache.get(main_cmd)
+            failed = _config_errors.get(main_cmd)
+        if entry and time.time() - entry[4] < _CACHE_TTLS.get(main_cmd, _CACHE_TTL):
+            return entry[:4]
+        raise RuntimeError(failed[0] if failed else 'DVR query failed')
+
+    try:
+        return _fetch_config(main_cmd)
+    except Exception as e:
+        with _cache_lock:
+            _config_errors[main_cmd] = (str(e), time.time())
+        raise
+    finally:
+        with _cache_lock:
+            del _inflight[main_cmd]
+        done.set()
+
+
+def _get_config_entry(main_cmd):
+    """
+    Get a single config from DVR with memory + disk caching.
+    Returns (data, body, gzip_body, etag) where body is the encoded JSON
+    and gzip_body its compressed form (None if too small to bother).
+    """
+    # 1. Check memory cache (and recent failures)
+    now = time.time()
+    stale = None
+    revalidate = False
     with _cache_lock:
         if main_cmd in _config_cache:
-            data, ts = _config_cache[main_cmd]
-            if now - ts < _CACHE_TTL:
-                return data
+            data, body, gz, etag, ts = stale = _config_cache[main_cmd]
+            ttl = _CACHE_TTLS.get(main_cmd, _CACHE_TTL)
+            if now - ts < ttl:
+                return data, body, gz, etag
+            # Recently expired: answer with it now, refresh in the background
+            if now - ts < ttl + _STALE_TTL and not data.get('_cached'):
+                revalidate = main_cmd not in _refreshing
+                if not revalidate:
+                    return data, body, gz, etag
+                _refreshing.add(main_cmd)
+        failed = _config_errors.get(main_cmd)
+    if revalidate:
+        _refresh_executor.submit(_refresh_config, main_cmd, stale)
+        return stale[:4]
+
+    # 2. Query DVR on a pooled connection, unless it just failed
+    try:
+        if failed and now - failed[1] < _ERROR_TTL:
+            raise RuntimeError(failed[0])
+        return _fetch_config_coalesced(main_cmd)
+    except Exception:
+        # 3. Fall back to the last known copy (memory, then disk)
+        entry = _fallback_entry(main_cmd, stale)
+        if entry is None:
+            raise
+        return entry
 
-    # 2. Query DVR (serialized)
-    with _dvr_lock:
-        # Double-check memory cache
+
+def _fallback_entry(main_cmd, stale):
+    """
+    Offline copy of a config, marked _cached: the expired memory entry
+    *stale* if there is one, else the disk file. None if neither exists.
+    """
+    if stale is not None:
+        if stale[0].get('_cached'):
+            return stale[:4]
+        entry = _cached_entry(main_cmd, dict(stale[0]))
+        ts = stale[4]
+    else:
+        cached = _load_disk_cache(main_cmd)
+        if not cached:
+            return None
+        entry = _cached_entry(main_cmd, cached)
+        ts = 0.0
+    # Keep the encoded fallback (still expired) so further failures
+    # serve it as-is instead of re-reading and re-encoding it
+    with _cache_lock:
+        if _config_cache.get(main_cmd) is stale:
+            _config_cache[main_cmd] = entry + (ts,)
+    return entry
+
+
+def _refresh_config(main_cmd, stale):
+    """Background half of stale-while-revalidate for one config."""
+    try:
+        _fetch_config_coalesced(main_cmd)
+    except Exception as e:
+        log.debug('Background refresh of config %s failed: %s', main_cmd, e)
+        # Requests must now see the copy they get as offline data
+        _fallback_entry(main_cmd, stale)
+    finally:
         with _cache_lock:
-            if main_cmd in _config_cache:
-                data, ts = _config_cache[main_cmd]
-                if now - ts < _CACHE_TTL:
-                    return data
+            _refreshing.discard(main_cmd)
 
-        for attempt in range(2):
-            try:
-                _ensure_client()
-                data = _dvr_client.get_config(main_cmd)
-                _enrich(data)
-                with _cache_lock:
-                    _config_cache[main_cmd] = (data, time.time())
-                _save_disk_cache(main_cmd, data)
-                return data
-            except Exception:
-                if _dvr_client:
-                    _dvr_client.close()
-                    _dvr_client = None
-                if attempt == 1:
-                    # 3. Fall back to disk cache
-                    cached = _load_disk_cache(main_cmd)
-                    if cached:
-                        cached['_cached'] = True
-                        return _enrich(cached)
-                    raise
-
-
-def _get_all_configs():
-    """Get all configs, reusing the shared DVR connection."""
-    results = {}
-    for mc, info in CONFIG_TYPES.items():
+
+def _get_config(main_cmd):
+    """Get a single config dict (see _get_config_entry)."""
+    return _get_config_entry(main_cmd)[0]
+
+
+def _get_config_body(main_cmd):
+    """Get a single config as ready-to-send (body, gzip_body, etag)."""
+    return _get_config_entry(main_cmd)[1:]
+
+
+def _cached_configs(mcs):
+    """
+    Return {mc: (data, body, gzip_body, etag)} for the configs in mcs that
+    are fresh in memory.
+    """
+    now = time.time()
+    hits = {}
+    with _cache_lock:
+        for mc in mcs:
+            entry = _config_cache.get(mc)
+            if entry and now - entry[4] < _CACHE_TTLS.get(mc, _CACHE_TTL):
+                hits[mc] = entry[:4]
+    return hits
+
+
+def _get_all_config_bodies():
+    """
+    Get every config as encoded JSON bytes: fresh ones straight from
+    memory, the rest fanned out across the DVR connection pool.
+    """
+    results = {mc: entry[1] for mc, entry in _cached_configs(CONFIG_TYPES).items()}
+    futs = {_dvr_executor.submit(_get_config_body, mc): (mc, info)
+            for mc, info in CONFIG_TYPES.items() if mc not in results}
+    for fut in as_completed(futs):
+        mc, info = futs[fut]
         try:
-            results[str(mc)] = _get_config(mc)
+            results[mc] = fut.result()[0]
         except Exception as e:
-            results[str(mc)] = {
+            results[mc] = _json_bytes({
                 'error': str(e),
                 'type_name': info['name'],
                 'type_icon': info['icon'],
                 'type_description': info['description'],
-            }
+            })
     return results
 
 
+def _get_all_configs_body():
+    """Encoded /api/config (body, gzip_body, etag), cached briefly."""
+    global _all_configs_cache
+    with _cache_lock:
+        if _all_configs_cache is not None:
+            body, gz, etag, ts = _all_configs_cache
+            if time.time() - ts < _ALL_CONFIGS_TTL:
+                return body, gz, etag
+    # Splice the per-config bodies (already encoded when they were cached)
+    # instead of re-serialising every config; keeps CONFIG_TYPES ordering
+    bodies = _get_all_config_bodies()
+    body = b'{%s}' % b','.join(b'"%d":%s' % (mc, bodies[mc]) for mc in CONFIG_TYPES)
+    gz = _gzip_body(body, _GZIP_STORED_LEVEL)
+    etag = _etag(body)
+    with _cache_lock:
+        _all_configs_cache = (body, gz, etag, time.time())
+    return body, gz, etag
+
+
+_STATUS_KEYS = {123: 'device_info', 129: 'device_status',
+                111: 'system_time', 127: 'storage'}
+_status_cache = None               # (ETags of the _STATUS_KEYS configs, body, etag)
+
+
 def _get_status():
-    """Get DVR status summary (4 key configs)."""
+    """Get DVR status summary (4 key configs, queried in parallel)."""
     result = {}
+    keys = _STATUS_KEYS
     try:
-        for mc, key in [(123, 'device_info'), (129, 'device_status'),
-                        (111, 'system_time'), (127, 'storage')]:
-            cfg = _get_config(mc)
-            result[key] = cfg.get('data', {})
+        for mc, entry in _cached_configs(keys).items():
+            result[keys[mc]] = entry[0].get('data', {})
+        futs = {_dvr_executor.submit(_get_config, mc): key
+                for mc, key in keys.items() if keys[mc] not in result}
+        for fut in as_completed(futs):
+            result[futs[fut]] = fut.result().get('data', {})
         result['connected'] = True
     except Exception as e:
         result['connected'] = False
@@ -272,21 +745,71 @@ def _get_status():
     return result
 
 
+def _get_status_body():
+    """
+    Encoded /api/status (body, etag). While all four configs are served
+    from cache unchanged, the previously encoded body is reused.
+    """
+    global _status_cache
+    hits = _cached_configs(_STATUS_KEYS)
+    sig = None
+    if len(hits) == len(_STATUS_KEYS):
+        sig = tuple(hits[mc][3] for mc in _STATUS_KEYS)
+        cached = _status_cache
+        if cached is not None and cached[0] == sig:
+            return cached[1], cached[2]
+    body = _json_bytes(_get_status())
+    etag = _etag(body)
+    if sig is not None:
+        _status_cache = (sig, body, etag)
+    return body, etag
+
+
+def _configs_due():
+    """Config types missing from the cache or expiring before the next pass."""
+    now = time.time()
+    due = []
+    with _cache_lock:
+        for mc in CONFIG_TYPES:
+            entry = _config_cache.get(mc)
+            if (entry is None or entry[0].get('_cached') or
+                    now - entry[4] + _KEEPALIVE_INTERVAL >= _CACHE_TTLS.get(mc, _CACHE_TTL)):
+                due.append(mc)
+    return due
+
+
+def _dvr_keepalive_loop():
+    """
+    Background thread: connect at startup, then re-read every config just
+    before it expires, so user GETs are served from memory and a pooled
+    connection stays logged in.
+    """
+    while True:
+        try:
+            for mc in _configs_due():
+                _fetch_config_coalesced(mc)
+            delay = _KEEPALIVE_INTERVAL
+        except Exception as e:
+            log.debug('DVR keep-alive failed: %s', e)
+            delay = _KEEPALIVE_RETRY
+        time.sleep(delay)
+
+
 # ── Google Drive OAuth helpers ────────────────────────
 
 def _gdrive_load_oauth_cfg():
     """Load OAuth client credentials from disk."""
     try:
-        with open(GDRIVE_OAUTH_CFG_PATH) as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        with open(GDRIVE_OAUTH_CFG_PATH, 'rb') as f:
+            return _json_loads(f.read())
+    except (FileNotFoundError, ValueError):
         return {}
 
 
 def _gdrive_save_oauth_cfg(cfg):
     os.makedirs(os.path.dirname(GDRIVE_OAUTH_CFG_PATH), exist_ok=True)
-    with open(GDRIVE_OAUTH_CFG_PATH, 'w') as f:
-        json.dump(cfg, f, indent=2)
+    _write_atomic(GDRIVE_OAUTH_CFG_PATH,
+                  json.dumps(cfg, indent=2).encode())
 
 
 def _gdrive_get_uploader():
@@ -301,7 +824,35 @@ def _gdrive_get_uploader():
     )
 
 
+_gdrive_status_cache = None    # (file signature, status dict)
+
+
+def _file_sig(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def _gdrive_status():
+    """
+    OAuth config + connection status. The result only depends on the
+    OAuth config and token files, so it is rebuilt only when one of them
+    changes (both are replaced atomically on save).
+    """
+    global _gdrive_status_cache
+    sig = (_file_sig(GDRIVE_OAUTH_CFG_PATH), _file_sig(GDRIVE_TOKEN_PATH))
+    cached = _gdrive_status_cache
+    if cached is not None and cached[0] == sig:
+        return dict(cached[1])
+    status = _gdrive_status_uncached()
+    _gdrive_status_cache = (sig, status)
+    return dict(status)
+
+
+def _gdrive_status_uncached():
     cfg = _gdrive_load_oauth_cfg()
     has_token = os.path.isfile(GDRIVE_TOKEN_PATH)
     connected = False
@@ -323,9 +874,66 @@ def _gdrive_status():
 
 # ── HTTP Handler ──────────────────────────────────────
 
+_TCP_CORK = getattr(socket, 'TCP_CORK', None)   # Linux only
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def _parse_range(header, size):
+    """
+    Parse a single-range 'Range: bytes=...' header against a file size.
+    Returns (start, end) inclusive, None to send the whole file (no header,
+    an invalid spec such as bytes=5-3, or a form we don't handle such as
+    multiple ranges), or False if the range can't be satisfied (416).
+    """
+    if not header:
+        return None
+    m = _RANGE_RE.match(header.strip())
+    if not m or not (m.group(1) or m.group(2)):
+        return None
+    first, last = m.groups()
+    if not first:                       # bytes=-N: the last N bytes
+        n = int(last)
+        if n == 0 or size == 0:
+            return False
+        return max(size - n, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None                     # invalid spec: RFC 7233 says ignore it
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+@functools.lru_cache(maxsize=64)
+def _mime_for(ext):
+    """Content-Type for a file extension (recordings are nearly all .mp4)."""
+    return mimetypes.guess_type('x' + ext)[0] or 'application/octet-stream'
+
+
+def _status_line(code):
+    return b'HTTP/1.1 %d %s\r\n' % (code, http.HTTPStatus(code).phrase.encode())
+
+
+_STATUS_LINES = {code: _status_line(code)
+                 for code in (200, 204, 304, 400, 404, 500, 502)}
+# Headers end_headers() adds to every response, preformatted for _write_raw
+_COMMON_HEADERS = (b'Access-Control-Allow-Origin: *\r\n'
+                   b'Cache-Control: no-cache\r\n')
+_JSON_HEADERS = (b'Content-Type: application/json; charset=utf-8\r\n'
+                 b'Vary: Accept-Encoding\r\n')
+
+
 class DVRHandler(http.server.SimpleHTTPRequestHandler):
     """Handles static files + REST API."""
 
+    # Keep-alive: every response path sends Content-Length (or has no body)
+    protocol_version = 'HTTP/1.1'
+    # Close idle keep-alive connections quickly: an idle connection holds
+    # one of the HTTP_WORKERS threads, and a browser keeps ~6 open per tab
+    timeout = 5
+    _pretty = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=WEB_DIR, **kwargs)
 
@@ -337,126 +945,268 @@ class DVRHandler(http.server.SimpleHTTPRequestHandler):
     def log_message(self, fmt, *args):
         sys.stderr.write(f'[dvr-web] {args[0]}\n')
 
+    def _route(self, routes, prefix_routes=()):
+        """
+        Split the request target once and look up its handler: exact
+        paths first, then prefixes. Returns (handler, path, query_params);
+        handler is None for unknown paths.
+        """
+        # Per-request flag on a per-connection handler: clear it so a
+        # ?pretty=1 GET doesn't leak into later requests on a keep-alive
+        self._pretty = False
+        path, _, query = self.path.partition('?')
+        handler = routes.get(path)
+        if handler is None:
+            for prefix, h in prefix_routes:
+                if path.startswith(prefix):
+                    handler = h
+                    break
+        params = dict(urllib.parse.parse_qsl(query)) if query else {}
+        return handler, path, params
+
     def do_GET(self):
-        path = self.path.split('?')[0]
+        handler, path, params = self._route(self._GET_ROUTES,
+                                            self._GET_PREFIX_ROUTES)
+        # ?pretty=1: indented JSON for reading in a browser (wire stays compact)
+        self._pretty = params.get('pretty') in ('1', 'true')
+        if handler is None:
+            super().do_GET()
+        else:
+            handler(self, path, params)
 
-        if path == '/api/config':
-            self._json_response(_get_all_configs())
-        elif path.startswith('/api/config/'):
-            mc_str = path.split('/')[-1]
-            try:
-                mc = int(mc_str)
-            except ValueError:
-                self._json_response({'error': f'Invalid config type: {mc_str}'}, 400)
-                return
-            if mc not in CONFIG_TYPES:
-                self._json_response({'error': f'Unknown config type {mc}'}, 404)
-                return
-            try:
-                self._json_response(_get_config(mc))
-            except Exception as e:
-                self._json_response({'error': str(e)}, 502)
-        elif path == '/api/status':
-            self._json_response(_get_status())
-        elif path == '/api/config-types':
-            self._json_response([
-                {'main_cmd': mc, 'name': info['name'],
-                 'icon': info['icon'], 'description': info['description']}
-                for mc, info in sorted(CONFIG_TYPES.items())
-            ])
-        elif path == '/settings' or path == '/settings/':
-            self._serve_file('settings.html')
-        elif path == '/recordings' or path == '/recordings/':
-            self._serve_file('recordings.html')
-        elif path == '/api/recordings':
-            params = {}
-            if '?' in self.path:
-                qs = self.path.split('?', 1)[1]
-                params = dict(urllib.parse.parse_qsl(qs))
-            
-            offset = int(params.get('offset', 0))
-            limit = int(params.get('limit', 50))
-            date_filter = params.get('date', None)
-
-            self._json_response(_recorder.get_recordings(
-                offset=offset, limit=limit, date_filter=date_filter
-            ))
-        elif path == '/api/recordings/status':
-            self._json_response(_recorder.get_status())
-        elif path == '/api/recordings/dates':
-            self._json_response(_recorder.get_recording_dates())
-        elif path == '/api/recordings/config':
-            self._json_response(_recorder.get_config())
-        elif path.startswith('/api/recordings/download/'):
-            self._serve_recording(path)
-        elif path == '/api/dvr/discover':
-            # ?probe=1 forces a live scan; default is cached last-known
-            params = self.path.split('?', 1)[1] if '?' in self.path else ''
-            force = 'probe=1' in params or 'probe=true' in params
-            if force:
-                found = _probe_for_dvr()
-            else:
-                found = ([os.environ.get('DVR_HOST', '')]
-                         if os.environ.get('DVR_HOST') else [])
+    # ── GET handlers ──
+
+    def _get_config_all(self, path, params):
+        body, gz, etag = _get_all_configs_body()
+        self._json_response_bytes(body, etag, gz=gz)
+
+    def _get_config_one(self, path, params):
+        mc_str = path.split('/')[-1]
+        try:
+            mc = int(mc_str)
+        except ValueError:
+            self._json_response({'error': f'Invalid config type: {mc_str}'}, 400)
+            return
+        if mc not in CONFIG_TYPES:
+            self._json_response({'error': f'Unknown config type {mc}'}, 404)
+            return
+        try:
+            body, gz, etag = _get_config_body(mc)
+        except Exception as e:
+            self._json_response({'error': str(e)}, 502)
+        else:
+            self._json_response_bytes(body, etag, gz=gz)
+
+    def _get_dvr_status(self, path, params):
+        self._json_response_bytes(*_get_status_body())
+
+    def _get_config_types(self, path, params):
+        self._json_response_bytes(_CONFIG_TYPES_BODY, _CONFIG_TYPES_ETAG,
+                                  gz=_CONFIG_TYPES_GZ)
+
+    def _get_settings_page(self, path, params):
+        self._serve_file('settings.html')
+
+    def _get_recordings_page(self, path, params):
+        self._serve_file('recordings.html')
+
+    def _get_recordings(self, path, params):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 50))
+        date_filter = params.get('date', None)
+
+        self._json_response(_recorder.get_recordings(
+            offset=offset, limit=limit, date_filter=date_filter
+        ))
+
+    def _get_recordings_status(self, path, params):
+        self._json_response(_recorder.get_status())
+
+    def _get_recordings_dates(self, path, params):
+        self._json_response(_recorder.get_recording_dates())
+
+    def _get_recordings_config(self, path, params):
+        self._json_response(_recorder.get_config())
+
+    def _get_recording_download(self, path, params):
+        self._serve_recording(path)
+
+    def _get_discover(self, path, params):
+        # ?probe=1 starts a live scan; default is cached last-known
+        if params.get('probe') in ('1', 'true'):
+            self._discover_response()
+            return
+        found = ([os.environ.get('DVR_HOST', '')]
+                 if os.environ.get('DVR_HOST') else [])
+        self._json_response({
+            'dvrs': found,
+            'current': os.environ.get('DVR_HOST', ''),
+        })
+
+    def _get_discover_result(self, path, params):
+        probe_id = path.rsplit('/', 1)[-1]
+        fut = _probe_jobs.get(probe_id)
+        if fut is None:
+            self._json_response({'error': f'Unknown probe {probe_id}'}, 404)
+        elif not fut.done():
+            self._json_response({'probe_id': probe_id, 'status': 'scanning'})
+        elif fut.exception() is not None:
+            self._json_response({'probe_id': probe_id, 'status': 'error',
+                                 'error': str(fut.exception())})
+        else:
             self._json_response({
-                'dvrs': found,
+                'probe_id': probe_id,
+                'status': 'done',
+                'dvrs': fut.result(),
                 'current': os.environ.get('DVR_HOST', ''),
             })
-        elif path == '/api/gdrive/status':
-            self._json_response(_gdrive_status())
-        elif path == '/api/gdrive/poll':
-            # ?device_code=xxx
-            params = self.path.split('?', 1)[1] if '?' in self.path else ''
-            qs = dict(urllib.parse.parse_qsl(params))
-            device_code = qs.get('device_code', '')
-            if not device_code:
-                self._json_response({'error': 'missing device_code'}, 400)
-                return
-            try:
-                from hieasy_dvr.gdrive import OAuthDriveUploader
-                cfg = _gdrive_load_oauth_cfg()
-                token = OAuthDriveUploader.poll_token(
-                    cfg.get('client_id', ''),
-                    cfg.get('client_secret', ''),
-                    device_code,
-                )
-                if token:
-                    up = _gdrive_get_uploader()
-                    up.store_token(token)
-                    # Reinit recorder uploader
-                    _recorder.update_config({'gdrive_enabled': _recorder.gdrive_enabled})
-                    self._json_response({'status': 'connected'})
-                else:
-                    self._json_response({'status': 'pending'})
-            except Exception as e:
-                self._json_response({'status': 'error', 'error': str(e)})
-        elif path == '/favicon.ico':
-            # Return empty 204 to avoid 404 noise in logs
-            self.send_response(204)
-            self.end_headers()
+
+    def _discover_response(self):
+        """Start (or reuse) a network scan: 202 + probe id, or the fresh result."""
+        probe_id, found = _start_probe()
+        if probe_id is not None:
+            self._json_response({'probe_id': probe_id, 'status': 'scanning'}, 202)
         else:
-            super().do_GET()
+            self._json_response({
+                'status': 'done',
+                'dvrs': found,
+                'current': os.environ.get('DVR_HOST', ''),
+            })
+
+    def _get_gdrive_status(self, path, params):
+        self._json_response(_gdrive_status())
+
+    def _get_gdrive_poll(self, path, params):
+        # ?device_code=xxx
+        device_code = params.get('device_code', '')
+        if not device_code:
+            self._json_response({'error': 'missing device_code'}, 400)
+            return
+        try:
+            from hieasy_dvr.gdrive import OAuthDriveUploader
+            cfg = _gdrive_load_oauth_cfg()
+            token = OAuthDriveUploader.poll_token(
+                cfg.get('client_id', ''),
+                cfg.get('client_secret', ''),
+                device_code,
+            )
+            if token:
+                up = _gdrive_get_uploader()
+                up.store_token(token)
+                # Reinit recorder uploader
+                _recorder.update_config({'gdrive_enabled': _recorder.gdrive_enabled})
+                self._json_response({'status': 'connected'})
+            else:
+                self._json_response({'status': 'pending'})
+        except Exception as e:
+            self._json_response({'status': 'error', 'error': str(e)})
+
+    def _get_favicon(self, path, params):
+        # Return empty 204 to avoid 404 noise in logs
+        self._write_raw(204)
 
     def _json_response(self, data, code=200):
-        body = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
-        self.send_response(code)
-        self.send_header('Content-Type', 'application/json; charset=utf-8')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        body = _json_bytes(data)
+        self._json_response_bytes(body, _etag(body) if code == 200 else None, code)
+
+    def _json_response_bytes(self, body, etag=None, code=200, gz=None):
+        """
+        Send an already-encoded JSON body (304 if the client's copy matches).
+        Bodies are gzipped when the client accepts it; pass *gz* to reuse a
+        pre-compressed copy instead of compressing per request.
+        """
+        if self._pretty:
+            body = json.dumps(_json_loads(body), ensure_ascii=False,
+                              indent=2).encode('utf-8')
+            gz = None
+            if etag:
+                etag = etag[:-1] + '-pretty"'
+        encoding = None
+        if ('gzip' in self.headers.get('Accept-Encoding', '')
+                and len(body) >= _GZIP_MIN_SIZE):
+            body = gz if gz is not None else _gzip_body(body)
+            encoding = 'gzip'
+            if etag:
+                etag = etag[:-1] + '-gz"'   # distinct tag per representation
+        if etag and self._not_modified(etag):
+            return
+        head = [_JSON_HEADERS, b'Content-Length: %d\r\n' % len(body)]
+        if encoding:
+            head.append(b'Content-Encoding: gzip\r\n')
+        if etag:
+            head.append(b'ETag: %s\r\n' % etag.encode())
+        self._write_raw(code, b''.join(head), body)
+
+    def _write_raw(self, code, headers=b'', body=b''):
+        """
+        Send a whole small response in a single write: status line, the
+        Server/Date and end_headers() headers, *headers* (preformatted
+        header lines) and *body*.
+        """
+        self.log_request(code)
+        self.wfile.write(b''.join((
+            _STATUS_LINES.get(code) or _status_line(code),
+            b'Server: %s\r\nDate: %s\r\n' % (
+                self.version_string().encode(), self.date_time_string().encode()),
+            headers,
+            _COMMON_HEADERS,
+            b'\r\n',
+            body,
+        )))
+
+    def _not_modified(self, etag):
+        """Send 304 and return True if If-None-Match covers *etag*."""
+        inm = self.headers.get('If-None-Match')
+        if not inm:
+            return False
+        tags = [t.strip().removeprefix('W/') for t in inm.split(',')]
+        if etag not in tags and '*' not in tags:
+            return False
+        self._write_raw(304, b'ETag: %s\r\n' % etag.encode())
+        return True
+
+    def copyfile(self, source, outputfile):
+        """Send a file to the client with sendfile() (zero-copy) when possible."""
+        if outputfile is self.wfile:
+            # socket.sendfile() itself falls back to send() for non-regular files
+            self.connection.sendfile(source)
+        else:
+            super().copyfile(source, outputfile)
+
+    def _cork(self, on):
+        """
+        Linux TCP_CORK: while set, headers and the start of the sendfile()
+        payload are held back and sent as full segments.
+        """
+        if _TCP_CORK is not None:
+            try:
+                self.connection.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, on)
+            except OSError:
+                pass
 
     def _serve_file(self, filename):
         filepath = os.path.join(WEB_DIR, filename)
-        if not os.path.isfile(filepath):
+        try:
+            f = open(filepath, 'rb')
+        except OSError:
             self.send_error(404)
             return
-        with open(filepath, 'rb') as f:
-            body = f.read()
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        with f:
+            st = os.fstat(f.fileno())
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            if self._not_modified(etag):
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(st.st_size))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+            self._cork(1)
+            try:
+                self.end_headers()
+                self.copyfile(f, self.wfile)
+            finally:
+                self._cork(0)
 
     def _serve_recording(self, path):
         """Serve a recording file for download."""
@@ -472,129 +1222,236 @@ class DVRHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(403)
             return
         filepath = os.path.join(_recorder.record_dir, ch, fname)
-        if not os.path.isfile(filepath):
+        try:
+            f = open(filepath, 'rb')
+        except OSError:
             self.send_error(404)
             return
-        fsize = os.path.getsize(filepath)
-        mime = mimetypes.guess_type(filepath)[0] or 'application/octet-stream'
-        self.send_response(200)
-        self.send_header('Content-Type', mime)
-        self.send_header('Content-Length', str(fsize))
-        self.send_header('Content-Disposition', f'attachment; filename="{fname}"')
-        self.end_headers()
-        with open(filepath, 'rb') as f:
-            while True:
-                chunk = f.read(65536)
-                if not chunk:
-                    break
-                self.wfile.write(chunk)
+        with f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                self.send_error(404)
+                return
+            fsize = st.st_size
+            # Byte ranges let players seek without re-downloading the clip
+            rng = _parse_range(self.headers.get('Range'), fsize)
+            if rng is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{fsize}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if rng is None:
+                start, length = 0, fsize
+                self.send_response(200)
+            else:
+                start, end = rng
+                length = end - start + 1
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{fsize}')
+            self.send_header('Content-Type', _mime_for(os.path.splitext(fname)[1]))
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Disposition', f'attachment; filename="{fname}"')
+            self._cork(1)
+            try:
+                self.end_headers()
+                if length:
+                    # sendfile(): no userspace copy
+                    self.connection.sendfile(f, start, length)
+            finally:
+                self._cork(0)
 
     def do_DELETE(self):
-        path = self.path.split('?')[0]
-        # DELETE /api/recordings/<channel>/<filename>
-        if path.startswith('/api/recordings/') and path.count('/') == 4:
-            parts = path.split('/')
-            ch, fname = parts[3], parts[4]
-            try:
-                _recorder.delete_recording(ch, fname)
-                self._json_response({'ok': True})
-            except FileNotFoundError:
-                self._json_response({'error': 'File not found'}, 404)
-            except ValueError as e:
-                self._json_response({'error': str(e)}, 400)
-            except Exception as e:
-                self._json_response({'error': str(e)}, 500)
+        handler, path, params = self._route({}, self._DELETE_PREFIX_ROUTES)
+        self._read_raw_body()   # unused, but keep a kept-alive connection in sync
+        if handler is None:
+            self.send_error(404)
         else:
+            handler(self, path, params)
+
+    def _delete_recording(self, path, params):
+        # DELETE /api/recordings/<channel>/<filename>
+        if path.count('/') != 4:
             self.send_error(404)
+            return
+        parts = path.split('/')
+        ch, fname = parts[3], parts[4]
+        try:
+            _recorder.delete_recording(ch, fname)
+            self._json_response({'ok': True})
+        except FileNotFoundError:
+            self._json_response({'error': 'File not found'}, 404)
+        except ValueError as e:
+            self._json_response({'error': str(e)}, 400)
+        except Exception as e:
+            self._json_response({'error': str(e)}, 500)
 
     def do_POST(self):
-        path = self.path.split('?')[0]
-        if path == '/api/recordings/start':
-            _recorder.enabled = True
-            _recorder.start()
-            self._json_response({'ok': True, 'status': 'started'})
-        elif path == '/api/recordings/stop':
-            _recorder.stop()
-            self._json_response({'ok': True, 'status': 'stopped'})
-        elif path == '/api/recordings/config':
-            body = self._read_body()
+        handler, path, params = self._route(self._POST_ROUTES)
+        # Always consume the body so a kept-alive connection stays in sync,
+        # but only parse it for the handlers that take JSON
+        raw = self._read_raw_body()
+        if handler is None:
+            self.send_error(404)
+            return
+        body = {}
+        if handler in self._POST_JSON_HANDLERS and raw:
+            try:
+                body = _json_loads(raw)
+            except ValueError:   # JSONDecodeError / UnicodeDecodeError
+                pass
             if not isinstance(body, dict):
                 self._json_response({'error': 'Expected JSON object'}, 400)
                 return
-            try:
-                _recorder.update_config(body, persist_path=RECORDING_CONFIG_PATH)
-                self._json_response({'ok': True, 'config': _recorder.get_config()})
-            except Exception as e:
-                self._json_response({'error': str(e)}, 500)
-        elif path == '/api/recordings/delete-all':
-            try:
-                count = _recorder.delete_all_recordings()
-                self._json_response({'ok': True, 'deleted': count})
-            except Exception as e:
-                self._json_response({'error': str(e)}, 500)
-        elif path == '/api/dvr/discover':
-            found = _probe_for_dvr()
+        handler(self, body)
+
+    # ── POST handlers ──
+
+    def _post_recordings_start(self, body):
+        _recorder.enabled = True
+        _recorder.start()
+        self._json_response({'ok': True, 'status': 'started'})
+
+    def _post_recordings_stop(self, body):
+        _recorder.stop()
+        self._json_response({'ok': True, 'status': 'stopped'})
+
+    def _post_recordings_config(self, body):
+        try:
+            _recorder.update_config(body, persist_path=RECORDING_CONFIG_PATH)
+            self._json_response({'ok': True, 'config': _recorder.get_config()})
+        except Exception as e:
+            self._json_response({'error': str(e)}, 500)
+
+    def _post_recordings_delete_all(self, body):
+        try:
+            count = _recorder.delete_all_recordings()
+            self._json_response({'ok': True, 'deleted': count})
+        except Exception as e:
+            self._json_response({'error': str(e)}, 500)
+
+    def _post_discover(self, body):
+        self._discover_response()
+
+    def _post_gdrive_config(self, body):
+        try:
+            cfg = _gdrive_load_oauth_cfg()
+            for k in ('client_id', 'folder_id', 'delete_local'):
+                if k in body:
+                    cfg[k] = body[k]
+            # Only overwrite secret if a real value is provided (not '***')
+            if body.get('client_secret', '') not in ('', '***'):
+                cfg['client_secret'] = body['client_secret']
+            _gdrive_save_oauth_cfg(cfg)
+            # Propagate folder_id to recorder
+            if 'folder_id' in body:
+                _recorder.gdrive_folder_id = cfg['folder_id']
+            self._json_response({'ok': True, 'status': _gdrive_status()})
+        except Exception as e:
+            self._json_response({'error': str(e)}, 500)
+
+    def _post_gdrive_connect(self, body):
+        """Start device-flow; returns user_code + verification_url."""
+        try:
+            from hieasy_dvr.gdrive import OAuthDriveUploader
+            cfg = _gdrive_load_oauth_cfg()
+            if not cfg.get('client_id') or not cfg.get('client_secret'):
+                self._json_response({'error': 'client_id and client_secret must be set first'}, 400)
+                return
+            resp = OAuthDriveUploader.start_device_auth(
+                cfg['client_id'], cfg['client_secret'])
             self._json_response({
-                'dvrs': found,
-                'current': os.environ.get('DVR_HOST', ''),
+                'user_code':        resp.get('user_code'),
+                'verification_url': resp.get('verification_url'),
+                'device_code':      resp.get('device_code'),
+                'expires_in':       resp.get('expires_in', 300),
+                'interval':         resp.get('interval', 5),
             })
-        elif path == '/api/gdrive/config':
-            body = self._read_body()
-            try:
-                cfg = _gdrive_load_oauth_cfg()
-                for k in ('client_id', 'folder_id', 'delete_local'):
-                    if k in body:
-                        cfg[k] = body[k]
-                # Only overwrite secret if a real value is provided (not '***')
-                if body.get('client_secret', '') not in ('', '***'):
-                    cfg['client_secret'] = body['client_secret']
-                _gdrive_save_oauth_cfg(cfg)
-                # Propagate folder_id to recorder
-                if 'folder_id' in body:
-                    _recorder.gdrive_folder_id = cfg['folder_id']
-                self._json_response({'ok': True, 'status': _gdrive_status()})
-            except Exception as e:
-                self._json_response({'error': str(e)}, 500)
-        elif path == '/api/gdrive/connect':
-            """Start device-flow; returns user_code + verification_url."""
-            try:
-                from hieasy_dvr.gdrive import OAuthDriveUploader
-                cfg = _gdrive_load_oauth_cfg()
-                if not cfg.get('client_id') or not cfg.get('client_secret'):
-                    self._json_response({'error': 'client_id and client_secret must be set first'}, 400)
-                    return
-                resp = OAuthDriveUploader.start_device_auth(
-                    cfg['client_id'], cfg['client_secret'])
-                self._json_response({
-                    'user_code':        resp.get('user_code'),
-                    'verification_url': resp.get('verification_url'),
-                    'device_code':      resp.get('device_code'),
-                    'expires_in':       resp.get('expires_in', 300),
-                    'interval':         resp.get('interval', 5),
-                })
-            except Exception as e:
-                self._json_response({'error': str(e)}, 500)
-        elif path == '/api/gdrive/disconnect':
-            try:
-                up = _gdrive_get_uploader()
-                up.revoke()
-                _recorder.gdrive_enabled = False
-                self._json_response({'ok': True})
-            except Exception as e:
-                self._json_response({'error': str(e)}, 500)
-        else:
-            self.send_error(404)
+        except Exception as e:
+            self._json_response({'error': str(e)}, 500)
 
-    def _read_body(self):
-        """Read and parse JSON POST body."""
-        length = int(self.headers.get('Content-Length', 0))
-        if length == 0:
-            return {}
-        raw = self.rfile.read(length)
+    def _post_gdrive_disconnect(self, body):
         try:
-            return json.loads(raw.decode('utf-8'))
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            return {}
+            up = _gdrive_get_uploader()
+            up.revoke()
+            _recorder.gdrive_enabled = False
+            self._json_response({'ok': True})
+        except Exception as e:
+            self._json_response({'error': str(e)}, 500)
+
+    def _read_raw_body(self):
+        """Read the request body as bytes (b'' when there is none)."""
+        length = int(self.headers.get('Content-Length', 0))
+        if length <= 0:
+            return b''
+        return self.rfile.read(length)
+
+    # ── Routing tables (exact path → handler; prefixes scanned in order) ──
+
+    _GET_ROUTES = {
+        '/api/config':             _get_config_all,
+        '/api/status':             _get_dvr_status,
+        '/api/config-types':       _get_config_types,
+        '/settings':               _get_settings_page,
+        '/settings/':              _get_settings_page,
+        '/recordings':             _get_recordings_page,
+        '/recordings/':            _get_recordings_page,
+        '/api/recordings':         _get_recordings,
+        '/api/recordings/status':  _get_recordings_status,
+        '/api/recordings/dates':   _get_recordings_dates,
+        '/api/recordings/config':  _get_recordings_config,
+        '/api/dvr/discover':       _get_discover,
+        '/api/gdrive/status':      _get_gdrive_status,
+        '/api/gdrive/poll':        _get_gdrive_poll,
+        '/favicon.ico':            _get_favicon,
+    }
+    _GET_PREFIX_ROUTES = (
+        ('/api/config/',               _get_config_one),
+        ('/api/recordings/download/',  _get_recording_download),
+        ('/api/dvr/discover/',         _get_discover_result),
+    )
+    _POST_ROUTES = {
+        '/api/recordings/start':       _post_recordings_start,
+        '/api/recordings/stop':        _post_recordings_stop,
+        '/api/recordings/config':      _post_recordings_config,
+        '/api/recordings/delete-all':  _post_recordings_delete_all,
+        '/api/dvr/discover':           _post_discover,
+        '/api/gdrive/config':          _post_gdrive_config,
+        '/api/gdrive/connect':         _post_gdrive_connect,
+        '/api/gdrive/disconnect':      _post_gdrive_disconnect,
+    }
+    # POST handlers that read a JSON object body; the rest ignore it
+    _POST_JSON_HANDLERS = frozenset((
+        _post_recordings_config,
+        _post_gdrive_config,
+    ))
+    _DELETE_PREFIX_ROUTES = (
+        ('/api/recordings/',  _delete_recording),
+    )
+
+class PooledHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer that hands connections to a fixed set of worker
+    threads instead of starting a new thread per connection. Connections
+    beyond the pool size wait in the accept queue until a worker frees up.
+    """
+
+    def __init__(self, server_address, handler_class, workers=HTTP_WORKERS):
+        self._pending = queue.SimpleQueue()
+        super().__init__(server_address, handler_class)
+        for i in range(workers):
+            threading.Thread(target=self._worker, daemon=True,
+                             name=f'http-{i}').start()
+
+    def _worker(self):
+        while True:
+            request, client_address = self._pending.get()
+            # Handles errors and closes the connection, as in ThreadingMixIn
+            self.process_request_thread(request, client_address)
+
+    def process_request(self, request, client_address):
+        self._pending.put((request, client_address))
 
 
 # ── mediamtx subprocess management ────────────────────
@@ -609,13 +1466,13 @@ def _start_mediamtx():
     mediamtx_yml = os.path.join(BASE_DIR, 'mediamtx.yml')
 
     if not os.path.isfile(mediamtx_bin):
-        print(f'[dvr] mediamtx not found at {mediamtx_bin}, skipping RTSP server')
+        log.info('mediamtx not found at %s, skipping RTSP server', mediamtx_bin)
         return
     if not os.path.isfile(mediamtx_yml):
-        print(f'[dvr] mediamtx.yml not found, skipping RTSP server')
+        log.info('mediamtx.yml not found, skipping RTSP server')
         return
 
-    print(f'[dvr] Starting mediamtx...')
+    log.info('Starting mediamtx...')
     _mediamtx_proc = subprocess.Popen(
         [mediamtx_bin, mediamtx_yml],
         cwd=BASE_DIR,
@@ -628,7 +1485,7 @@ def _stop_mediamtx():
     """Stop mediamtx subprocess."""
     global _mediamtx_proc
     if _mediamtx_proc and _mediamtx_proc.poll() is None:
-        print('[dvr] Stopping mediamtx...')
+        log.info('Stopping mediamtx...')
         _mediamtx_proc.terminate()
         try:
             _mediamtx_proc.wait(timeout=5)
@@ -644,15 +1501,20 @@ def main():
     def _shutdown(signum, frame):
         _recorder.stop()
         _stop_mediamtx()
+        _flush_disk_cache()
         sys.exit(0)
 
     signal.signal(signal.SIGTERM, _shutdown)
 
-    with http.server.ThreadingHTTPServer(('', PORT), DVRHandler) as httpd:
-        print(f'[dvr] Dashboard: http://0.0.0.0:{PORT}/')
-        print(f'[dvr]   Live:     http://0.0.0.0:{PORT}/')
-        print(f'[dvr]   Settings: http://0.0.0.0:{PORT}/settings')
-        print(f'[dvr]   Record:   http://0.0.0.0:{PORT}/recordings')
+    _warm_cache()
+    threading.Thread(target=_dvr_keepalive_loop, daemon=True,
+                     name='dvr-keepalive').start()
+
+    with PooledHTTPServer(('', PORT), DVRHandler) as httpd:
+        log.info('Dashboard: http://0.0.0.0:%d/', PORT)
+        log.info('  Live:     http://0.0.0.0:%d/', PORT)
+        log.info('  Settings: http://0.0.0.0:%d/settings', PORT)
+        log.info('  Record:   http://0.0.0.0:%d/recordings', PORT)
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
@@ -660,7 +1522,8 @@ def main():
         finally:
             _recorder.stop()
             _stop_mediamtx()
-            print('\n[dvr] Stopped.')
+            _flush_disk_cache()
+            log.info('Stopped.')
 
 
 if __name__ == '__main__':
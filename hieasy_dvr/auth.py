@@ -18,6 +18,7 @@ The DES variant is non-standard ("HiEasy DES"):
   - No L/R swap before final permutation (FP applied to L||R)
   - All permutation tables are standard DES
 """
+import functools
 import logging
 import random
 
@@ -89,7 +90,9 @@ def _bits_to_bytes(bits, start=1, count=64):
     return bytes(result)
 
 
+@functools.lru_cache(maxsize=8)
 def _key_schedule(key_bytes):
+    """16 round subkeys for a key (cached: every login reuses the password)."""
     key_bits = _bytes_to_bits(key_bytes)
     pc1_bits = _permute(key_bits, _PC1)
     C = [0] + pc1_bits[1:29]
@@ -100,7 +103,7 @@ def _key_schedule(key_bytes):
         D = _left_shift(D, _SHIFTS[r])
         CD = [0] + C[1:] + D[1:]
         subkeys.append(_permute(CD, _PC2))
-    return subkeys
+    return tuple(subkeys)
 
 
 def _feistel(R, subkey):
@@ -2,26 +2,45 @@
 DVR client — manages command and media connections to the HiEasy DVR.
 """
 import socket
-import struct
 import threading
 import re
-import time
 import logging
+from collections import deque
+from contextlib import contextmanager
 
 from .protocol import (
-    CMD_MAGIC, VERSION, HEADER_SIZE,
+    HEADER_SIZE,
     pack_cmd_header, pack_media_header, make_xml,
-    recv_msg, parse_body,
+    MsgReader, parse_body, recv_into_exact,
     ID_LOGIN_GET_FLAG, ID_USER_LOGIN,
     ID_STREAM_CREATE, ID_STREAM_START,
     ID_STREAM_STOP, ID_STREAM_DESTROY,
-    ID_LOGOUT, ID_HEARTBEAT_REPLY,
+    ID_LOGOUT, ID_HEARTBEAT, ID_HEARTBEAT_REPLY,
 )
 from .auth import compute_hash
 from .stream import iter_frames
 
 log = logging.getLogger(__name__)
 
+_MSG_MAX_COUNT = 200    # unclaimed command messages kept for _wait_for
+
+_LOGIN_FLAG_RE = re.compile(r'LoginFlag="([^"]*)"')
+_MEDIA_SESSION_RE = re.compile(r'MediaSession="(\d+)"')
+
+# The header carries no command id, so heartbeats are recognised by the
+# <Command ID="78"> tag that opens the body (right after the XML declaration)
+_HB_NOTICE_TAG = b'<Command ID="%d"' % ID_HEARTBEAT
+_HB_TAG_SCAN = 128
+
+# Heartbeat reply: constant body, header differs only in the echoed txn
+_HB_REPLY_BODY = make_xml(
+    ID_HEARTBEAT_REPLY,
+    '<HeartBeatNoticeReply CmdReply="0" '
+    'NetDataFlow="0" NetHistoryDataFlow="0" />',
+)
+_HB_REPLY_PACKET = pack_cmd_header(len(_HB_REPLY_BODY), txn=0) + _HB_REPLY_BODY
+_TXN_SLICE = slice(8, 12)   # header field 2
+
 
 class DVRClient:
     """
@@ -39,19 +58,29 @@ class DVRClient:
     """
 
     def __init__(self, host, cmd_port=5050, media_port=6050,
-                 username='admin', password='123456'):
+                 username='admin', password='123456', media_rcvbuf=None):
         self.host = host
         self.cmd_port = cmd_port
         self.media_port = media_port
         self.username = username
         self.password = password
+        self.media_rcvbuf = media_rcvbuf    # SO_RCVBUF bytes (None = OS default)
 
         self._cmd_sock = None
+        self._cmd_reader = None
         self._media_sock = None
         self._session = None
         self._running = False
-        self._msgs = []
+        self._reader = None     # (Thread, stop Event) of this connection's reader
+        self._msgs = deque(maxlen=_MSG_MAX_COUNT)   # oldest dropped when full
+        # Pending _wait_for calls, oldest first: [tag bytes, Event,
+        # (hdr, body) once it arrives]. A list, so concurrent waits for
+        # the same tag each get their own message.
+        self._waiters = []
         self._lock = threading.Lock()
+        self._send_lock = threading.Lock()   # one writer on the command socket
+        self._send_buf = bytearray()   # commands queued inside _cmd_batch()
+        self._batching = False
 
     # ------------------------------------------------------------------
     # Connection lifecycle
@@ -70,30 +99,31 @@ class DVRClient:
         self._cmd_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._cmd_sock.settimeout(10)
         self._cmd_sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Login, stream setup and heartbeat replies are small request/reply
+        # exchanges: don't let Nagle hold them back waiting for an ACK
+        self._cmd_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self._cmd_sock.connect((self.host, self.cmd_port))
+        self._cmd_reader = MsgReader(self._cmd_sock)
 
         # --- Login ---
         self._login()
 
-        # Start background threads
-        self._running = True
-        threading.Thread(target=self._reader_loop, daemon=True).start()
-        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        # Start the background reader (it also answers heartbeats)
+        self._start_reader()
 
         # --- Create stream ---
-        xml = make_xml(
+        self._send_cmd(make_xml(
             ID_STREAM_CREATE,
             '<RealStreamCreateRequest Channel="{}" Mode="{}" Type="1" />'.format(
                 channel, stream_type
             ),
-        )
-        self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
+        ))
 
         _, reply = self._wait_for('RealStreamCreateReply', timeout=5)
         if not reply:
             raise ConnectionError("No RealStreamCreateReply from DVR")
 
-        m = re.search(r'MediaSession="(\d+)"', reply)
+        m = _MEDIA_SESSION_RE.search(reply)
         if not m:
             raise ConnectionError("No MediaSession in reply: " + reply[:200])
         self._session = int(m.group(1))
@@ -103,16 +133,24 @@ class DVRClient:
         self._media_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._media_sock.settimeout(10)
         self._media_sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._media_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.media_rcvbuf:
+            # Must be set before connect() so the TCP window scale covers it
+            self._media_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                        self.media_rcvbuf)
+            log.debug("Media SO_RCVBUF: %d",
+                      self._media_sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
         self._media_sock.connect((self.host, self.media_port))
         self._media_sock.sendall(pack_media_header(self._session))
-        self._media_sock.recv(HEADER_SIZE)  # Handshake reply
+        # Handshake reply: read all 36 bytes so none leak into the frame parser
+        if recv_into_exact(self._media_sock, bytearray(HEADER_SIZE)) < HEADER_SIZE:
+            raise ConnectionError("Media connection closed during handshake")
 
         # --- Start stream ---
-        xml = make_xml(
+        self._send_cmd(make_xml(
             ID_STREAM_START,
             '<RealStreamStartRequest MediaSession="{}" />'.format(self._session),
-        )
-        self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
+        ))
         self._wait_for('RealStreamStartReply', timeout=3)
         log.info("Stream started on channel %d", channel)
 
@@ -130,46 +168,53 @@ class DVRClient:
 
     def disconnect(self):
         """Gracefully disconnect from the DVR."""
-        self._running = False
-
         try:
             if self._session and self._cmd_sock:
-                # Stop stream
-                xml = make_xml(
-                    ID_STREAM_STOP,
-                    '<RealStreamStopRequest MediaSession="{}" />'.format(
-                        self._session
-                    ),
-                )
-                self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
-                time.sleep(0.2)
-
-                # Destroy stream
-                xml = make_xml(
-                    ID_STREAM_DESTROY,
-                    '<RealStreamDestroyRequest MediaSession="{}" />'.format(
-                        self._session
-                    ),
-                )
-                self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
-                time.sleep(0.2)
-
-                # Logout
-                xml = make_xml(
-                    ID_LOGOUT,
-                    '<Logout UserName="{}" />'.format(self.username),
-                )
-                self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
+                # Stop, destroy and logout go out in a single write
+                with self._cmd_batch():
+                    self._send_cmd(make_xml(
+                        ID_STREAM_STOP,
+                        '<RealStreamStopRequest MediaSession="{}" />'.format(
+                            self._session
+                        ),
+                    ))
+                    self._send_cmd(make_xml(
+                        ID_STREAM_DESTROY,
+                        '<RealStreamDestroyRequest MediaSession="{}" />'.format(
+                            self._session
+                        ),
+                    ))
+                    self._send_cmd(make_xml(
+                        ID_LOGOUT,
+                        '<Logout UserName="{}" />'.format(self.username),
+                    ))
+                # The reader thread is still up: return as soon as the DVR
+                # confirms the teardown rather than sleeping a fixed time
+                if self._running:
+                    self._wait_for('RealStreamDestroyReply', timeout=0.3)
         except Exception:
             pass
+        self._running = False
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader[1].set()
 
         for sock in (self._media_sock, self._cmd_sock):
+            if sock is None:
+                continue
             try:
-                sock.close()
-            except Exception:
+                sock.shutdown(socket.SHUT_RDWR)   # wakes a blocked recv()
+            except OSError:
                 pass
+            sock.close()
+
+        # Don't return (and allow an immediate reconnect) while the old
+        # reader could still be reading
+        if reader is not None and reader[0] is not threading.current_thread():
+            reader[0].join(timeout=2)
 
         self._cmd_sock = None
+        self._cmd_reader = None
         self._media_sock = None
         self._session = None
         log.info("Disconnected")
@@ -178,15 +223,58 @@ class DVRClient:
     # Internal
     # ------------------------------------------------------------------
 
+    def _start_reader(self):
+        """
+        Start the reader thread for the current command connection. It gets
+        this connection's socket, MsgReader and stop Event as arguments, so
+        a reader left over from a previous connection never touches a new one.
+        """
+        self._running = True
+        self._msgs.clear()
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._reader_loop,
+            args=(self._cmd_sock, self._cmd_reader, stop), daemon=True)
+        self._reader = (thread, stop)
+        thread.start()
+
+    def _send_cmd(self, xml):
+        """Frame and send one command body (queued while in _cmd_batch)."""
+        with self._send_lock:
+            self._send_buf += pack_cmd_header(len(xml))
+            self._send_buf += xml
+            if not self._batching:
+                self._flush_cmd()
+
+    def _flush_cmd(self):
+        """Write out queued commands in one sendall. Caller holds _send_lock."""
+        if self._send_buf:
+            try:
+                self._cmd_sock.sendall(self._send_buf)
+            finally:
+                self._send_buf.clear()
+
+    @contextmanager
+    def _cmd_batch(self):
+        """Defer _send_cmd writes and flush them together on exit."""
+        with self._send_lock:
+            self._batching = True
+        try:
+            yield
+        finally:
+            with self._send_lock:
+                self._batching = False
+                self._flush_cmd()
+
     def _login(self):
         """Perform LoginGetFlag → hash oracle → UserLogin."""
         # Get nonce
-        xml = make_xml(ID_LOGIN_GET_FLAG, f'<LoginGetFlag UserName="{self.username}" />')
-        self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
+        self._send_cmd(make_xml(ID_LOGIN_GET_FLAG,
+                                f'<LoginGetFlag UserName="{self.username}" />'))
 
-        _, body = recv_msg(self._cmd_sock)
+        _, body = self._cmd_reader.recv_msg()
         body_str = parse_body(body)
-        m = re.search(r'LoginFlag="([^"]*)"', body_str)
+        m = _LOGIN_FLAG_RE.search(body_str)
         if not m:
             raise ConnectionError("No LoginFlag in response: " + body_str[:200])
 
@@ -199,65 +287,77 @@ class DVRClient:
             raise ConnectionError("Hash oracle failed — cannot authenticate")
 
         # Send login
-        xml = make_xml(
+        self._send_cmd(make_xml(
             ID_USER_LOGIN,
             '<UserLogin UserName="{}" UserIP="192.168.1.1" '
             'UserMAC="00:00:00:00:00:00" LoginFlag="{}" />'.format(
                 self.username, hash_val
             ),
-        )
-        self._cmd_sock.sendall(pack_cmd_header(len(xml)) + xml)
+        ))
 
-        _, body = recv_msg(self._cmd_sock)
+        _, body = self._cmd_reader.recv_msg()
         body_str = parse_body(body)
         if 'CmdReply="0"' not in body_str:
             raise ConnectionError("Login failed: " + body_str[:200])
 
         log.info("Login successful")
 
-    def _reader_loop(self):
-        """Background thread: read messages from command socket."""
-        while self._running:
+    def _reader_loop(self, sock, reader, stop):
+        """Background thread: read command messages and answer heartbeats."""
+        while not stop.is_set():
             try:
-                hdr, body = recv_msg(self._cmd_sock, timeout=1)
+                hdr, body = reader.recv_msg(timeout=1)
+                if stop.is_set():
+                    break
                 if hdr and body:
+                    if body.find(_HB_NOTICE_TAG, 0, _HB_TAG_SCAN) >= 0:
+                        # Answered right here, undecoded: the reply is a
+                        # few hundred bytes and never waits on the DVR
+                        self._reply_heartbeat(sock, hdr)
+                        continue
+                    # Matched and queued raw; only _wait_for decodes, so
+                    # notices nobody asks for are never decoded at all
                     with self._lock:
-                        self._msgs.append((hdr, parse_body(body)))
+                        # Hand the message straight to a waiting _wait_for
+                        for waiter in self._waiters:
+                            if waiter[2] is None and waiter[0] in body:
+                                waiter[2] = (hdr, body)
+                                waiter[1].set()
+                                break
+                        else:
+                            self._msgs.append((hdr, body))
             except Exception:
                 pass
 
-    def _heartbeat_loop(self):
-        """Background thread: respond to HeartBeatNotice."""
-        while self._running:
-            with self._lock:
-                for i, (hdr, body_str) in enumerate(self._msgs):
-                    if 'HeartBeatNotice' in body_str and 'Reply' not in body_str:
-                        self._msgs.pop(i)
-                        try:
-                            r = make_xml(
-                                ID_HEARTBEAT_REPLY,
-                                '<HeartBeatNoticeReply CmdReply="0" '
-                                'NetDataFlow="0" NetHistoryDataFlow="0" />',
-                            )
-                            h = struct.pack(
-                                '>IIIIIIIII',
-                                CMD_MAGIC, VERSION, hdr[2], 0,
-                                len(r), 3, 0, 0, 0,
-                            )
-                            self._cmd_sock.sendall(h + r)
-                        except Exception:
-                            pass
-                        break
-            time.sleep(1)
+    def _reply_heartbeat(self, sock, hdr):
+        """Answer a HeartBeatNotice from the reader thread, echoing its txn."""
+        packet = bytearray(_HB_REPLY_PACKET)   # only the txn field changes
+        packet[_TXN_SLICE] = hdr[2].to_bytes(4, 'big')
+        try:
+            with self._send_lock:
+                sock.sendall(packet)
+        except Exception:
+            pass
 
     def _wait_for(self, tag, timeout=5):
-        """Wait for a message containing `tag` in the reader queue."""
-        deadline = time.time() + timeout
-        while time.time() < deadline:
+        """
+        Wait for a message containing `tag`: take it from the reader queue
+        if it already arrived, else have the reader thread hand it over.
+        """
+        key = tag.encode()
+        with self._lock:
+            for i, (hdr, body) in enumerate(self._msgs):
+                if key in body:
+                    del self._msgs[i]
+                    return hdr, parse_body(body)
+            waiter = [key, threading.Event(), None]
+            self._waiters.append(waiter)
+        try:
+            waiter[1].wait(timeout)
+        finally:
             with self._lock:
-                for i, (hdr, body_str) in enumerate(self._msgs):
-                    if tag in body_str:
-                        self._msgs.pop(i)
-                        return hdr, body_str
-            time.sleep(0.1)
-        return None, None
+                self._waiters[:] = [w for w in self._waiters if w is not waiter]
+        if waiter[2] is None:
+            return None, None
+        hdr, body = waiter[2]
+        return hdr, parse_body(body)
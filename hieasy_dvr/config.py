@@ -6,9 +6,17 @@ by this DVR firmware (returns error 16001 for all config types).
 """
 
 import socket
+import sys
 import re
-import xml.etree.ElementTree as ET
-from .protocol import CMD_MAGIC, VERSION, HEADER_SIZE, pack_cmd_header, make_xml, recv_msg, parse_body
+try:
+    from lxml import etree as ET    # optional: faster parse and tree walk (pip3 install lxml)
+    # Match stdlib ET: no comment / PI nodes among an element's children
+    _XML_PARSER_OPTS = {'remove_comments': True, 'remove_pis': True}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _XML_PARSER_OPTS = {}
+from .protocol import (CMD_MAGIC, VERSION, HEADER_SIZE, pack_cmd_header, make_xml,
+                       recv_msg, parse_body, next_txn)
 from .auth import compute_hash
 
 # ── Config type registry ──────────────────────────────
@@ -104,33 +112,47 @@ CONFIG_TYPES = {
 
 def _xml_element_to_dict(elem):
     """Convert an XML element (and children) to a nested dict."""
-    result = {}
     # Add attributes
-    if elem.attrib:
-        result.update(elem.attrib)
+    result = dict(elem.attrib)
+    text = elem.text
+    if not len(elem) and not (text and not text.isspace()):
+        return result   # attribute-only leaf: the bulk of every config
     # Add children
-    children_by_tag = {}
-    for child in elem:
-        tag = child.tag
-        child_dict = _xml_element_to_dict(child)
-        if tag in children_by_tag:
-            # Multiple children with same tag → make a list
-            if not isinstance(children_by_tag[tag], list):
-                children_by_tag[tag] = [children_by_tag[tag]]
-            children_by_tag[tag].append(child_dict)
-        else:
-            children_by_tag[tag] = child_dict
-    if children_by_tag:
+    if len(elem):
+        children_by_tag = {}
+        for child in elem:
+            tag = child.tag
+            child_dict = _xml_element_to_dict(child)
+            prev = children_by_tag.get(tag)
+            if prev is None:
+                children_by_tag[tag] = child_dict
+            elif type(prev) is list:
+                prev.append(child_dict)
+            else:
+                # Multiple children with same tag → make a list
+                children_by_tag[tag] = [prev, child_dict]
         result['_children'] = children_by_tag
     # Add text content if present
-    if elem.text and elem.text.strip():
-        result['_text'] = elem.text.strip()
+    if text and not text.isspace():
+        result['_text'] = text.strip()
     return result
 
 
-def parse_config_xml(xml_str):
+def _parse_xml(data):
+    """Parse XML bytes as UTF-8, whatever encoding they declare."""
+    parser = ET.XMLParser(encoding='utf-8', **_XML_PARSER_OPTS)
+    parser.feed(data)
+    return parser.close()
+
+
+def parse_config_xml(xml):
     """
-    Parse a GetCfgReply XML string into a structured dict.
+    Parse a GetCfgReply XML body into a structured dict.
+
+    Args:
+        xml: the reply as str, or the raw body bytes. Bytes go straight to
+            the parser as UTF-8 (the DVR declares GB2312, which expat can't
+            decode, but actually sends UTF-8).
 
     Returns:
         {
@@ -142,18 +164,28 @@ def parse_config_xml(xml_str):
             'data': {tag: {attrs...}, ...}  # the actual config elements
         }
     """
-    # Parse XML
-    # Strip the XML declaration if present (ET doesn't need it)
-    xml_clean = re.sub(r'<\?xml[^?]*\?>\s*', '', xml_str)
+    raw = xml if isinstance(xml, str) else None
     try:
-        root = ET.fromstring(xml_clean)
+        root = _parse_xml(xml.encode('utf-8') if raw is not None
+                          else xml.rstrip(b'\x00'))
     except ET.ParseError:
-        return {'error': 'XML parse error', 'raw': xml_str}
+        root = None
+    if root is None and raw is None:
+        # e.g. invalid UTF-8: retry on the lenient str decode
+        raw = parse_body(xml)
+        try:
+            root = _parse_xml(raw.encode('utf-8'))
+        except ET.ParseError:
+            pass
+    if root is None:
+        return {'error': 'XML parse error', 'raw': raw}
 
     # Find GetCfgReply element
     reply = root.find('.//GetCfgReply')
     if reply is None:
-        return {'error': 'No GetCfgReply found', 'raw': xml_str}
+        if raw is None:
+            raw = parse_body(xml)
+        return {'error': 'No GetCfgReply found', 'raw': raw}
 
     result = {
         'config_len': int(reply.get('ConfigLen', 0)),
@@ -178,6 +210,38 @@ def parse_config_xml(xml_str):
     return result
 
 
+_LOGIN_FLAG_RE = re.compile(r'LoginFlag="([^"]*)"')
+# Heartbeats interleaved with GetCfg replies: matched on the raw body,
+# answered with a reply built once
+_HB_MARK = b'HeartBeat'
+_HB_REPLY = make_xml(79, '<HeartBeatNoticeReply />')
+
+# Pipelined GetCfg replies are waited for this long each; a DVR that can't
+# keep up should fall back quickly instead of after the 15 s socket timeout
+_PIPELINE_REPLY_TIMEOUT = 3
+# Cleared after the first failed pipeline: firmware that mishandles queued
+# requests gets sequential GetCfgs from then on (shared by all clients)
+_pipeline_ok = True
+
+
+# Linux socket option numbers the socket module may not export
+_SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46)
+
+# TCP keep-alive: first probe after 30 s idle, then every 10 s, give up after 3
+_KEEPALIVE_OPTS = [(getattr(socket, name), val) for name, val in
+                   (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3))
+                   if hasattr(socket, name)]
+
+
+def _quickack(sock):
+    """Ask Linux to ACK immediately (the flag is not sticky, so re-arm it)."""
+    if hasattr(socket, 'TCP_QUICKACK'):
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except OSError:
+            pass
+
+
 class DVRConfigClient:
     """Reads configuration from the DVR via GetCfg commands."""
 
@@ -193,7 +257,25 @@ class DVRConfigClient:
         """Establish TCP connection and log in."""
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock.settimeout(15)
-        self._sock.connect((self.host, self.port))
+        # GetCfg is small request/response ping-pong: don't let Nagle and
+        # delayed ACKs add ~40 ms to every round trip.
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Connections sit idle in the web server's pool; have the kernel
+        # notice a DVR that went away (reboot, cable pulled) within ~1 min
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for opt, val in _KEEPALIVE_OPTS:
+            self._sock.setsockopt(socket.IPPROTO_TCP, opt, val)
+        try:
+            self._sock.connect((self.host, self.port))
+        except OSError:
+            self.close()    # don't leave an unconnected socket behind
+            raise
+        if sys.platform.startswith('linux'):
+            try:
+                # Spin up to 50 µs on the NIC queue before sleeping in recv
+                self._sock.setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, 50)
+            except OSError:
+                pass  # needs CAP_NET_ADMIN above net.core.busy_read
         self._login()
 
     def close(self):
@@ -212,7 +294,7 @@ class DVRConfigClient:
         self._sock.sendall(pack_cmd_header(len(body)) + body)
         hdr, body = recv_msg(self._sock)
         xml = parse_body(body)
-        m = re.search(r'LoginFlag="([^"]*)"', xml)
+        m = _LOGIN_FLAG_RE.search(xml)
         if not m:
             raise ConnectionError(f'No LoginFlag in response: {xml[:200]}')
         nonce = m.group(1)
@@ -245,23 +327,71 @@ class DVRConfigClient:
         inner = f'<GetCfg MainCmd="{main_cmd}" AssistCmd="{assist_cmd}" />'
         body = make_xml(14, inner)
         self._sock.sendall(pack_cmd_header(len(body)) + body)
+        _quickack(self._sock)
 
         # Read response, handling possible heartbeat messages
         for _ in range(5):
             hdr, resp_body = recv_msg(self._sock)
             if hdr is None:
                 raise ConnectionError('No response from DVR')
-            xml_str = parse_body(resp_body)
-            # Skip heartbeat messages
-            if 'HeartBeat' in xml_str:
-                # Reply to heartbeat
-                hb_reply = make_xml(79, '<HeartBeatNoticeReply />')
-                self._sock.sendall(pack_cmd_header(len(hb_reply)) + hb_reply)
+            # Skip heartbeat messages (reply, but don't decode them)
+            if _HB_MARK in resp_body:
+                self._sock.sendall(pack_cmd_header(len(_HB_REPLY)) + _HB_REPLY)
                 continue
-            return parse_config_xml(xml_str)
+            return parse_config_xml(resp_body)
 
         raise ConnectionError('Too many non-config responses from DVR')
 
+    def get_configs(self, main_cmds, assist_cmd=-1):
+        """
+        Get several config types in one round trip: every GetCfg goes out
+        in a single write and replies are matched back by the header txn
+        (or, failing that, the reply's CfgInfo MainCommand).
+
+        Returns:
+            Dict mapping main_cmd → parsed config dict. Types whose reply
+            could not be matched (e.g. an error reply) are missing.
+        """
+        if not self._sock:
+            self.connect()
+
+        pending = {}    # txn → main_cmd
+        out = bytearray()
+        for mc in main_cmds:
+            body = make_xml(14, f'<GetCfg MainCmd="{mc}" AssistCmd="{assist_cmd}" />')
+            txn = next_txn()
+            pending[txn] = mc
+            out += pack_cmd_header(len(body), txn)
+            out += body
+        self._sock.sendall(out)
+        _quickack(self._sock)
+
+        # Every non-heartbeat message is the reply to one request (as in
+        # get_config), so stop after that many even if some can't be
+        # matched — an error or unknown-type reply leaves its type absent
+        # instead of waiting out the read timeout.
+        results = {}
+        for _ in range(len(pending)):
+            while True:
+                hdr, resp_body = recv_msg(self._sock, _PIPELINE_REPLY_TIMEOUT)
+                if hdr is None:
+                    raise ConnectionError('No response from DVR')
+                if _HB_MARK not in resp_body:
+                    break
+                self._sock.sendall(pack_cmd_header(len(_HB_REPLY)) + _HB_REPLY)
+            cfg = parse_config_xml(resp_body)
+            mc = pending.pop(hdr[2], None)
+            if mc is None:
+                # Reply without our txn: fall back to its MainCommand
+                for txn, want in pending.items():
+                    if want == cfg.get('main_cmd'):
+                        mc = pending.pop(txn)
+                        break
+                else:
+                    continue
+            results[mc] = cfg
+        return results
+
     def get_all_configs(self):
         """
         Get all known config types.
@@ -270,8 +400,38 @@ class DVRConfigClient:
             Dict mapping main_cmd → parsed config dict.
             Each entry also includes 'type_name', 'type_icon', 'type_description'.
         """
+        global _pipeline_ok
         results = {}
+        fetched = {}
+        down = None     # reconnect failed: don't pay a connect timeout per type
+        if _pipeline_ok:
+            try:
+                # Fast path: all types pipelined on one round trip
+                fetched = self.get_configs(CONFIG_TYPES)
+            except Exception:
+                _pipeline_ok = False
+                try:
+                    self.close()    # mid-pipeline failure: replies may be queued
+                    self.connect()
+                except Exception as err:
+                    down = err
         for mc, info in CONFIG_TYPES.items():
+            if mc in fetched:
+                cfg = fetched[mc]
+                cfg['type_name'] = info['name']
+                cfg['type_icon'] = info['icon']
+                cfg['type_description'] = info['description']
+                results[mc] = cfg
+                continue
+            # Not answered by the pipeline: fetch on its own
+            if down is not None:
+                results[mc] = {
+                    'error': str(down),
+                    'type_name': info['name'],
+                    'type_icon': info['icon'],
+                    'type_description': info['description'],
+                }
+                continue
             try:
                 cfg = self.get_config(mc)
                 cfg['type_name'] = info['name']
@@ -279,18 +439,21 @@ class DVRConfigClient:
                 cfg['type_description'] = info['description']
                 results[mc] = cfg
             except Exception as e:
-                # Reconnect on failure and continue
                 results[mc] = {
                     'error': str(e),
                     'type_name': info['name'],
                     'type_icon': info['icon'],
                     'type_description': info['description'],
                 }
+                if not isinstance(e, OSError):
+                    continue    # reply was read in full; connection still in sync
+                # Socket error or timeout: a late reply would desync the
+                # next request, so reconnect and continue
                 try:
                     self.close()
                     self.connect()
-                except Exception:
-                    pass
+                except Exception as err:
+                    down = err
         return results
 
     def __enter__(self):
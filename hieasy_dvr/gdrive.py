@@ -27,7 +27,11 @@ token is present.
 import os
 import json
 import time
+import random
 import logging
+import mimetypes
+import threading
+import http.client
 import urllib.request
 import urllib.parse
 import urllib.error
@@ -39,6 +43,9 @@ _TOKEN_URL       = 'https://oauth2.googleapis.com/token'
 _DRIVE_FILES_URL = 'https://www.googleapis.com/drive/v3/files'
 _DRIVE_UPLOAD_URL= 'https://www.googleapis.com/upload/drive/v3/files'
 _SCOPE           = 'https://www.googleapis.com/auth/drive.file'
+_SIMPLE_UPLOAD_MAX = 5 * 1024 * 1024   # legacy mode: below this, one-shot upload
+_RETRY_STATUS    = frozenset((429, 500, 502, 503, 504))
+_MAX_RETRIES     = 6    # per chunk: ~1+2+4+8+16+32 s of backoff before giving up
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -51,22 +58,94 @@ def _post_form(url, data):
         return json.loads(r.read())
 
 
-def _api_get(url, token, params=None):
+class _HTTPSPool:
+    """
+    Keep-alive HTTPS connections, pooled per host. urlopen() opens (and TLS
+    handshakes) a fresh connection for every request, and an upload is
+    several requests: session init plus one PUT per chunk. A connection is
+    checked out for the length of one request, so concurrent uploads each
+    get their own socket instead of queueing behind one.
+    """
+
+    def __init__(self):
+        self._idle = {}     # host → [idle HTTPSConnection]
+        self._lock = threading.Lock()
+
+    def request(self, method, url, body=None, headers=None, timeout=30):
+        """Send a request; returns (status, headers, body_bytes)."""
+        parts = urllib.parse.urlsplit(url)
+        host  = parts.netloc
+        path  = parts.path + ('?' + parts.query if parts.query else '')
+        for attempt in (0, 1):
+            with self._lock:
+                idle = self._idle.get(host)
+                conn = idle.pop() if idle else None
+            reused = conn is not None
+            if conn is None:
+                conn = http.client.HTTPSConnection(host, timeout=timeout)
+            elif conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue    # server closed the idle connection: redial once
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.setdefault(host, []).append(conn)
+            return resp.status, resp.headers, data
+
+
+def _backoff(attempt):
+    """Sleep before retry *attempt* (0-based): exponential plus jitter, max 64 s."""
+    time.sleep(min(2 ** attempt, 64) + random.random())
+
+
+def _committed(headers):
+    """Bytes Drive has stored, from a 308's Range header ('bytes=0-N')."""
+    rng = headers.get('Range')
+    return int(rng.rsplit('-', 1)[1]) + 1 if rng else 0
+
+
+def _put_timeout(nbytes):
+    """Socket timeout for a chunk PUT: 30 s plus 1 s per 64 KiB (~0.5 Mbit/s)."""
+    return 30 + nbytes // (64 * 1024)
+
+
+def _check(url, status, headers, data):
+    """Raise HTTPError for an error status, like urlopen() would."""
+    if status >= 400:
+        raise urllib.error.HTTPError(url, status, data[:200].decode(errors='replace'),
+                                     headers, None)
+
+
+def _api_get(http, url, token, params=None):
     if params:
         url += '?' + urllib.parse.urlencode(params)
-    req = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
-    with urllib.request.urlopen(req, timeout=15) as r:
-        return json.loads(r.read())
+    status, headers, data = http.request(
+        'GET', url, headers={'Authorization': f'Bearer {token}'}, timeout=15)
+    _check(url, status, headers, data)
+    return json.loads(data)
 
 
-def _api_post_json(url, token, body):
-    data = json.dumps(body).encode()
-    req  = urllib.request.Request(url, data=data, headers={
+def _api_post_json(http, url, token, body):
+    status, headers, data = http.request('POST', url, body=json.dumps(body).encode(),
+                                         headers={
         'Authorization': f'Bearer {token}',
         'Content-Type': 'application/json',
-    })
-    with urllib.request.urlopen(req, timeout=15) as r:
-        return json.loads(r.read())
+    }, timeout=15)
+    _check(url, status, headers, data)
+    return json.loads(data)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -83,6 +162,9 @@ class OAuthDriveUploader:
         self.folder_id     = folder_id
         self._token        = None
         self._subfolder_cache = {}
+        self._listed_parents  = set()   # parents whose subfolders are all cached
+        self._http         = _HTTPSPool()   # Drive API calls reuse connections
+        self._token_lock   = threading.Lock()
         if os.path.isfile(token_path):
             self._load_token()
 
@@ -121,9 +203,10 @@ class OAuthDriveUploader:
     def _access_token(self):
         if not self._token:
             raise RuntimeError('Not authenticated')
-        if time.time() > self._token.get('expires_at', 0) - 60:
-            self._refresh_access_token()
-        return self._token['access_token']
+        with self._token_lock:   # upload workers share one refresh
+            if time.time() > self._token.get('expires_at', 0) - 60:
+                self._refresh_access_token()
+            return self._token['access_token']
 
     @property
     def is_authenticated(self):
@@ -204,48 +287,65 @@ class OAuthDriveUploader:
             meta['parents'] = [parent]
 
         # Initiate resumable session
-        meta_bytes = json.dumps(meta).encode()
-        init_req   = urllib.request.Request(
-            _DRIVE_UPLOAD_URL + '?uploadType=resumable',
-            data=meta_bytes,
+        init_url = _DRIVE_UPLOAD_URL + '?uploadType=resumable'
+        status, headers, data = self._http.request('POST', init_url,
+            body=json.dumps(meta).encode(),
             headers={
                 'Authorization':           f'Bearer {token}',
                 'Content-Type':            'application/json',
-                'X-Upload-Content-Type':   'application/octet-stream',
+                'X-Upload-Content-Type':   (mimetypes.guess_type(filename)[0]
+                                            or 'application/octet-stream'),
                 'X-Upload-Content-Length': str(fsize),
-            },
-        )
-        with urllib.request.urlopen(init_req, timeout=30) as r:
-            session_url = r.headers.get('Location')
+            }, timeout=30)
+        _check(init_url, status, headers, data)
+        session_url = headers.get('Location')
         if not session_url:
             raise RuntimeError('No session URI from Drive — check credentials / folder ID')
 
-        # Upload in 4 MB chunks
-        CHUNK    = 4 * 1024 * 1024
+        # Upload in 8 MB chunks (a multiple of 256 KiB, as Drive requires).
+        # A dropped connection or 429/5xx backs off, asks Drive how much of
+        # the file it already has and resumes from there. The retry budget
+        # only resets when Drive reports progress, so a session that keeps
+        # failing can't loop forever on the 308s of the status queries.
+        CHUNK    = 8 * 1024 * 1024
         uploaded = 0
         file_id  = None
+        retries  = 0
+        query    = fsize == 0   # an empty status query finalizes a 0-byte file
         with open(filepath, 'rb') as f:
-            while uploaded < fsize:
-                chunk = f.read(CHUNK)
-                if not chunk:
-                    break
-                end = uploaded + len(chunk) - 1
-                put = urllib.request.Request(
-                    session_url, data=chunk, method='PUT',
-                    headers={
-                        'Content-Length': str(len(chunk)),
-                        'Content-Range':  f'bytes {uploaded}-{end}/{fsize}',
-                    })
+            while file_id is None:
+                if query:
+                    chunk, rng = b'', f'bytes */{fsize}'
+                else:
+                    f.seek(uploaded)
+                    chunk = f.read(CHUNK)
+                    rng   = f'bytes {uploaded}-{uploaded + len(chunk) - 1}/{fsize}'
                 try:
-                    with urllib.request.urlopen(put, timeout=120) as r:
-                        if r.status == 200:
-                            file_id = json.loads(r.read()).get('id')
-                except urllib.error.HTTPError as e:
-                    if e.code == 308:   # Resume Incomplete — expected for non-final chunks
-                        pass
-                    else:
-                        raise
-                uploaded += len(chunk)
+                    status, headers, data = self._http.request('PUT', session_url,
+                        body=chunk,
+                        headers={
+                            'Content-Length': str(len(chunk)),
+                            'Content-Range':  rng,
+                        }, timeout=_put_timeout(len(chunk)))
+                except (OSError, http.client.HTTPException) as e:
+                    status, err = None, e
+                if status in (200, 201):
+                    file_id = json.loads(data).get('id')
+                elif status == 308:   # Resume Incomplete — expected for non-final chunks
+                    committed = _committed(headers)
+                    if committed > uploaded:
+                        uploaded, retries = committed, 0
+                    query = False
+                elif status is None or status in _RETRY_STATUS:
+                    if retries >= _MAX_RETRIES:
+                        if status is None:
+                            raise err
+                        _check(session_url, status, headers, data)
+                    _backoff(retries)
+                    retries += 1
+                    query = True
+                else:
+                    _check(session_url, status, headers, data)
 
         log.info('Uploaded %s → Drive (id=%s)', filename, file_id)
         return file_id
@@ -258,20 +358,29 @@ class OAuthDriveUploader:
         if not parent:
             return None
         token = self._access_token()
-        q = (f"name='{name}' and '{parent}' in parents "
-             f"and mimeType='application/vnd.google-apps.folder' and trashed=false")
-        resp = _api_get(_DRIVE_FILES_URL, token, {'q': q, 'fields': 'files(id)'})
-        files = resp.get('files', [])
-        if files:
-            fid = files[0]['id']
-        else:
-            result = _api_post_json(_DRIVE_FILES_URL, token, {
-                'name': name,
-                'mimeType': 'application/vnd.google-apps.folder',
-                'parents': [parent],
-            })
-            fid = result['id']
-            log.info('Created Drive subfolder: %s (%s)', name, fid)
+        if parent not in self._listed_parents:
+            # One listing fills the cache for every existing subfolder
+            q = (f"'{parent}' in parents and "
+                 f"mimeType='application/vnd.google-apps.folder' and trashed=false")
+            params = {'q': q, 'fields': 'nextPageToken, files(id, name)',
+                      'pageSize': 1000}
+            while True:
+                resp = _api_get(self._http, _DRIVE_FILES_URL, token, params)
+                for f in resp.get('files', []):
+                    self._subfolder_cache.setdefault(f['name'], f['id'])
+                if not resp.get('nextPageToken'):
+                    break
+                params['pageToken'] = resp['nextPageToken']
+            self._listed_parents.add(parent)
+            if name in self._subfolder_cache:
+                return self._subfolder_cache[name]
+        result = _api_post_json(self._http, _DRIVE_FILES_URL, token, {
+            'name': name,
+            'mimeType': 'application/vnd.google-apps.folder',
+            'parents': [parent],
+        })
+        fid = result['id']
+        log.info('Created Drive subfolder: %s (%s)', name, fid)
         self._subfolder_cache[name] = fid
         return fid
 
@@ -287,7 +396,8 @@ class GDriveUploader:
         try:
             from google.oauth2 import service_account
             from googleapiclient.discovery import build
-            from googleapiclient.http import MediaFileUpload
+            from googleapiclient.http import MediaFileUpload, build_http
+            import google_auth_httplib2
             self._MediaUpload = MediaFileUpload
         except ImportError:
             raise RuntimeError(
@@ -303,14 +413,25 @@ class GDriveUploader:
             scopes=['https://www.googleapis.com/auth/drive.file'],
         )
         self._service  = build('drive', 'v3', credentials=creds, cache_discovery=False)
+        # httplib2 is not thread-safe: each upload worker gets its own Http
+        self._new_http = lambda: google_auth_httplib2.AuthorizedHttp(
+            creds, http=build_http())
+        self._local    = threading.local()
         self.folder_id = folder_id
         self._subfolder_cache = {}
+        self._listed_parents  = set()   # parents whose subfolders are all cached
         log.info('Google Drive (service account): %s', creds.service_account_email)
 
     @property
     def is_authenticated(self):
         return True
 
+    def _thread_http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = self._new_http()
+        return http
+
     def upload(self, filepath, filename=None, folder_id=None):
         if filename is None:
             filename = os.path.basename(filepath)
@@ -318,9 +439,16 @@ class GDriveUploader:
         meta   = {'name': filename}
         if parent:
             meta['parents'] = [parent]
-        media  = self._MediaUpload(filepath, resumable=True)
+        # 8 MB chunks instead of the 100 MB default; small segments go up
+        # in one request with no resumable-session round trip
+        resumable = os.path.getsize(filepath) > _SIMPLE_UPLOAD_MAX
+        media  = self._MediaUpload(filepath, chunksize=8 * 1024 * 1024,
+                                   resumable=resumable)
+        # num_retries: the client backs off on 429/5xx and dropped
+        # connections, and resumes a resumable upload where it stopped
         result = self._service.files().create(
-            body=meta, media_body=media, fields='id').execute()
+            body=meta, media_body=media, fields='id').execute(
+                http=self._thread_http(), num_retries=_MAX_RETRIES)
         log.info('Uploaded %s → Drive (service-account)', filename)
         return result['id']
 
@@ -330,17 +458,27 @@ class GDriveUploader:
         parent = parent_id or self.folder_id
         if not parent:
             return None
-        q = (f"name='{name}' and '{parent}' in parents "
-             f"and mimeType='application/vnd.google-apps.folder' and trashed=false")
-        hits  = self._service.files().list(q=q, fields='files(id)').execute()
-        files = hits.get('files', [])
-        if files:
-            fid = files[0]['id']
-        else:
-            fid = self._service.files().create(body={
-                'name': name,
-                'mimeType': 'application/vnd.google-apps.folder',
-                'parents': [parent],
-            }, fields='id').execute()['id']
+        if parent not in self._listed_parents:
+            # One listing fills the cache for every existing subfolder
+            q = (f"'{parent}' in parents and "
+                 f"mimeType='application/vnd.google-apps.folder' and trashed=false")
+            token = None
+            while True:
+                hits = self._service.files().list(
+                    q=q, fields='nextPageToken, files(id, name)',
+                    pageSize=1000, pageToken=token).execute(http=self._thread_http())
+                for f in hits.get('files', []):
+                    self._subfolder_cache.setdefault(f['name'], f['id'])
+                token = hits.get('nextPageToken')
+                if not token:
+                    break
+            self._listed_parents.add(parent)
+            if name in self._subfolder_cache:
+                return self._subfolder_cache[name]
+        fid = self._service.files().create(body={
+            'name': name,
+            'mimeType': 'application/vnd.google-apps.folder',
+            'parents': [parent],
+        }, fields='id').execute(http=self._thread_http())['id']
         self._subfolder_cache[name] = fid
         return fid
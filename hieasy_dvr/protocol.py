@@ -5,6 +5,7 @@ import struct
 
 # Header constants
 HEADER_SIZE = 36
+HEADER_STRUCT = struct.Struct('>IIIIIIIII')   # 9 big-endian uint32 fields
 CMD_MAGIC = 0x05011154
 MEDIA_MAGIC = 0x05011150
 VERSION = 0x00001001
@@ -40,55 +41,103 @@ def pack_cmd_header(body_len, txn=None):
     """Build a 36-byte command header."""
     if txn is None:
         txn = next_txn()
-    return struct.pack(
-        '>IIIIIIIII',
+    return HEADER_STRUCT.pack(
         CMD_MAGIC, VERSION, txn, 0, body_len, 3, 0, 0, 0
     )
 
 
 def pack_media_header(session_id):
     """Build a 36-byte media handshake header."""
-    return struct.pack(
-        '>IIIIIIIII',
+    return HEADER_STRUCT.pack(
         MEDIA_MAGIC, VERSION, 4, 0, 3, 0, 0, 0, session_id
     )
 
 
+_XML_PREFIX = (b'<?xml version="1.0" encoding="GB2312" standalone="yes" ?>\n'
+               b'<Command ID="')
+_XML_MID = b'">\n    '
+_XML_SUFFIX = b'\n</Command>\n\x00'
+
+
 def make_xml(cmd_id, inner):
-    """Build a null-terminated XML command body."""
-    xml = (
-        '<?xml version="1.0" encoding="GB2312" standalone="yes" ?>\n'
-        '<Command ID="{}">\n'
-        '    {}\n'
-        '</Command>\n'
-    ).format(cmd_id, inner)
-    return xml.encode('utf-8') + b'\x00'
+    """Build a null-terminated XML command body (*inner* may be str or bytes)."""
+    if isinstance(inner, str):
+        inner = inner.encode('utf-8')
+    return b'%s%d%s%s%s' % (_XML_PREFIX, cmd_id, _XML_MID, inner, _XML_SUFFIX)
+
+
+def recv_into_exact(sock, buf):
+    """
+    Fill *buf* (a bytearray) from *sock*, looping over short reads.
+    Returns the number of bytes received: len(buf) unless the peer closed.
+    """
+    view = memoryview(buf)
+    got, size = 0, len(buf)
+    while got < size:
+        n = sock.recv_into(view[got:])
+        if not n:
+            break
+        got += n
+    return got
 
 
 def recv_msg(sock, timeout=10):
     """
     Receive one complete message from a command socket.
-    Returns (header_tuple, body_bytes) or (None, None) on error.
+    Returns (header_tuple, body_bytearray) or (None, None) on error.
     Header tuple is 9 big-endian uint32 fields.
     """
     sock.settimeout(timeout)
-    buf = b''
-    while len(buf) < HEADER_SIZE:
-        chunk = sock.recv(HEADER_SIZE - len(buf))
-        if not chunk:
-            return None, None
-        buf += chunk
-    hdr = struct.unpack('>IIIIIIIII', buf)
-    body_len = hdr[4]
-    body = b''
-    while len(body) < body_len:
-        chunk = sock.recv(body_len - len(body))
-        if not chunk:
-            break
-        body += chunk
+    buf = bytearray(HEADER_SIZE)
+    if recv_into_exact(sock, buf) < HEADER_SIZE:
+        return None, None
+    hdr = HEADER_STRUCT.unpack_from(buf)
+    # Read straight into the final buffer instead of joining chunks
+    body = bytearray(hdr[4])
+    got = recv_into_exact(sock, body)
+    if got < len(body):
+        del body[got:]   # peer closed mid-body: return what arrived
     return hdr, body
 
 
+class MsgReader:
+    """
+    Buffered reader for a command socket. Each recv() asks for up to
+    `bufsize` bytes, so a header and its body, or several queued
+    messages, usually cost one syscall instead of two or more. A partly
+    received message stays buffered across a timeout.
+    """
+
+    def __init__(self, sock, bufsize=65536):
+        self.sock = sock
+        self._bufsize = bufsize
+        self._buf = bytearray()
+        self._timeout = sock.gettimeout()
+
+    def _fill(self, need, timeout):
+        """Buffer at least `need` bytes; False if the peer closed first."""
+        if timeout != self._timeout:
+            self.sock.settimeout(timeout)
+            self._timeout = timeout
+        while len(self._buf) < need:
+            chunk = self.sock.recv(self._bufsize)
+            if not chunk:
+                return False
+            self._buf += chunk
+        return True
+
+    def recv_msg(self, timeout=10):
+        """Same contract as recv_msg(); raises socket.timeout if idle."""
+        if not self._fill(HEADER_SIZE, timeout):
+            return None, None
+        hdr = HEADER_STRUCT.unpack_from(self._buf)
+        end = HEADER_SIZE + hdr[4]
+        self._fill(end, timeout)
+        body = bytes(self._buf[HEADER_SIZE:end])
+        del self._buf[:end]
+        return hdr, body
+
+
 def parse_body(body):
     """Decode XML body to string, stripping null terminator."""
     return body.decode('utf-8', errors='replace').rstrip('\x00')
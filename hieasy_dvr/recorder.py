@@ -3,7 +3,9 @@ DVR Recording Scheduler — records H.264 streams to MP4 segments and
 optionally uploads them to Google Drive.
 
 Uses dvr_feeder.py piped to ffmpeg's segment muxer for seamless,
-continuous recording with automatic file splitting.
+continuous recording with automatic file splitting.  With
+DVR_RECORD_SOURCE set, ffmpeg reads the channel's RTSP stream instead
+(e.g. from mediamtx) and no feeder process is started.
 
 Configuration (environment variables):
   DVR_RECORD_ENABLED       true/false           (default: false)
@@ -13,28 +15,61 @@ Configuration (environment variables):
   DVR_RECORD_RETENTION_HR  hours to keep local   (default: 24, 0=forever)
   DVR_RECORD_SCHEDULE      hour ranges           (default: 0-23 = always)
   DVR_RECORD_STREAM_TYPE   0=main 1=sub          (default: 0)
+  DVR_RECORD_SOURCE        RTSP URL, {channel} placeholder (default: feeder)
+                           example: rtsp://127.0.0.1:8554/ch{channel}
 
   DVR_GDRIVE_ENABLED       true/false            (default: false)
   DVR_GDRIVE_CREDENTIALS   path to JSON key      (required if gdrive on)
   DVR_GDRIVE_FOLDER_ID     Drive folder ID       (required if gdrive on)
   DVR_GDRIVE_DELETE_LOCAL   delete after upload   (default: false)
+  DVR_GDRIVE_CONCURRENCY    parallel uploads      (default: 4)
 
   DVR_UPLOAD_COMMAND        custom upload command (alternative to gdrive)
                             placeholders: {file} {channel} {filename}
+                            (also $DVR_FILE $DVR_CHANNEL $DVR_FILENAME)
                             example: rclone copy {file} gdrive:DVR/{channel}/
 """
 
 import os
+import re
 import sys
 import json
+import heapq
+import functools
+import shlex
 import time
+import select
 import logging
 import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+try:
+    # optional: event-driven upload queue instead of a 15 s directory poll
+    # (pip3 install inotify_simple)
+    from inotify_simple import INotify, flags as _inflags
+    _SEGMENT_EVENTS = _inflags.CLOSE_WRITE | _inflags.MOVED_TO
+except ImportError:
+    INotify = None
 
 log = logging.getLogger('dvr.recorder')
 
+_LISTING_TTL = 5.0      # seconds — longest a channel directory scan is reused
+# DVR_UPLOAD_COMMAND characters that need a shell (pipes, redirects, $VARS,
+# comments …)
+_SHELL_META = re.compile(r'[|&;<>()$`*?~#\n]')
+# A leading VAR=value assignment, or a first word that is a shell builtin
+# or keyword rather than a program on $PATH, also needs a shell
+_SHELL_ASSIGN = re.compile(r'\w+=')
+_SHELL_BUILTINS = frozenset((
+    '.', ':', '!', '{', 'alias', 'cd', 'case', 'eval', 'exec', 'export',
+    'for', 'if', 'read', 'set', 'source', 'trap', 'ulimit', 'umask',
+    'unset', 'until', 'while'))
+# Placeholder → environment variable carrying its value into a shell command
+_PLACEHOLDER_VARS = {'{file}': 'DVR_FILE', '{channel}': 'DVR_CHANNEL',
+                     '{filename}': 'DVR_FILENAME'}
+_PLACEHOLDER_RE = re.compile('|'.join(map(re.escape, _PLACEHOLDER_VARS)))
+
 
 class RecordingScheduler:
     """Manages per-channel recording processes + upload queue."""
@@ -53,6 +88,7 @@ class RecordingScheduler:
         _base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.record_dir = os.environ.get('DVR_RECORD_DIR', os.path.join(_base, 'recordings'))
         self._feeder_script = os.path.join(_base, 'dvr_feeder.py')
+        self.record_source = os.environ.get('DVR_RECORD_SOURCE', '')
 
         # ── Upload config ──
         self.gdrive_enabled = _env_bool('DVR_GDRIVE_ENABLED', False)
@@ -60,16 +96,22 @@ class RecordingScheduler:
         self.gdrive_folder_id = os.environ.get('DVR_GDRIVE_FOLDER_ID', '')
         self.gdrive_delete_local = _env_bool('DVR_GDRIVE_DELETE_LOCAL', False)
         self.upload_command = os.environ.get('DVR_UPLOAD_COMMAND', '')
+        self.upload_concurrency = max(1, int(os.environ.get('DVR_GDRIVE_CONCURRENCY', '4')))
 
         # ── Runtime state ──
         self._running = False
         self._threads = {}          # channel → Thread
-        self._processes = {}        # channel → (feeder, ffmpeg)
+        self._processes = {}        # channel → (feeder or None, ffmpeg)
         self._lock = threading.Lock()
         self._uploader = None       # GDriveUploader instance
         self._uploaded = set()      # filepaths already uploaded
         self._upload_failures = {}  # filepath → retry count
+        self._upload_pool = None    # ThreadPoolExecutor running _upload_job
+        self._inflight = set()      # filepaths queued or uploading
+        self._folder_lock = threading.Lock()
         self._status = {}           # channel → dict
+        self._listings = {}         # ch_dir → (dir mtime_ns, scanned_at, [(name, size, mtime)])
+        self._oldest_mtime = {}     # ch_dir → oldest mtime left by the last cleanup sweep
 
     # ── Public API ──────────────────────────────────────
 
@@ -130,9 +172,12 @@ class RecordingScheduler:
             self._threads[ch] = t
             t.start()
 
-        # Upload worker thread
+        # Upload scanner thread + worker pool
         if self._uploader or self.upload_command:
-            t = threading.Thread(target=self._upload_loop, daemon=True,
+            self._upload_pool = ThreadPoolExecutor(
+                max_workers=self.upload_concurrency, thread_name_prefix='rec-up')
+            t = threading.Thread(target=self._upload_loop,
+                                 args=(self._upload_pool,), daemon=True,
                                  name='rec-upload')
             t.start()
 
@@ -153,7 +198,8 @@ class RecordingScheduler:
         with self._lock:
             for ch, (feeder, ffmpeg) in list(self._processes.items()):
                 try:
-                    feeder.terminate()
+                    # Ending the input lets ffmpeg finalize the segment
+                    (feeder or ffmpeg).terminate()
                 except OSError:
                     pass
                 try:
@@ -164,6 +210,11 @@ class RecordingScheduler:
         for t in self._threads.values():
             t.join(timeout=10)
         self._threads.clear()
+        if self._upload_pool is not None:
+            # Drop queued uploads (the next scan finds them again); don't
+            # block the caller on a file that is already on the wire
+            self._upload_pool.shutdown(wait=False, cancel_futures=True)
+            self._upload_pool = None
         log.info('Recording stopped')
 
     def get_status(self):
@@ -171,7 +222,8 @@ class RecordingScheduler:
         return {
             'enabled': self.enabled,
             'running': self._running,
-            'channels': {str(ch): dict(s) for ch, s in self._status.items()},
+            'channels': {str(ch): self._channel_status(ch)
+                         for ch in list(self._status)},
             'gdrive_enabled': self.gdrive_enabled,
             'gdrive_connected': self._uploader is not None,
             'upload_command': bool(self.upload_command),
@@ -183,6 +235,15 @@ class RecordingScheduler:
             'record_dir': self.record_dir,
         }
 
+    def _channel_status(self, ch):
+        s = dict(self._status[ch])
+        try:
+            s['segments'] = len(self._scan_dir(
+                os.path.join(self.record_dir, f'ch{ch}')))
+        except FileNotFoundError:
+            pass
+        return s
+
     def get_config(self) -> dict:
         """Return current recorder configuration as a JSON-safe dict."""
         return {
@@ -240,25 +301,51 @@ class RecordingScheduler:
         elif was_running:
             log.info('Recording disabled \u2014 stopped')
 
+    def _scan_dir(self, ch_dir):
+        """
+        List (name, size, mtime) of the .mp4 files in a channel directory.
+        A scan is reused while the directory's mtime is unchanged (adding,
+        deleting or renaming a file bumps it) and it is under _LISTING_TTL
+        old. Raises FileNotFoundError if the directory is missing.
+        """
+        dir_mtime = os.stat(ch_dir).st_mtime_ns
+        now = time.monotonic()
+        hit = self._listings.get(ch_dir)
+        if hit and hit[0] == dir_mtime and now - hit[1] < _LISTING_TTL:
+            return hit[2]
+        files = []
+        with os.scandir(ch_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.mp4'):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.name, st.st_size, st.st_mtime))
+        self._listings[ch_dir] = (dir_mtime, now, files)
+        return files
+
     def _active_file(self, ch_dir):
         """Return the path of the MP4 currently being written, or None."""
         # The file being written is the most recently modified .mp4 in the
         # channel directory, but only when ffmpeg is actively running there.
+        # A new segment bumps the directory mtime, so a cached scan still
+        # has the right newest file.
         try:
-            files = [os.path.join(ch_dir, f)
-                     for f in os.listdir(ch_dir) if f.endswith('.mp4')]
+            files = self._scan_dir(ch_dir)
         except FileNotFoundError:
             return None
         if not files:
             return None
-        newest = max(files, key=lambda p: os.path.getmtime(p))
-        return newest
+        newest = max(files, key=lambda f: f[2])
+        return os.path.join(ch_dir, newest[0])
 
     def get_recordings(self, channel=None, limit=50, offset=0, date_filter=None):
         """List local recording files (newest first).
 
         Files that are currently being written by ffmpeg are excluded — they
-        have no moov atom yet and would be unplayable.
+        end in a partial fragment and have no seek index (mfra) yet.
         """
         # Determine which files are currently being written
         with self._lock:
@@ -271,67 +358,58 @@ class RecordingScheduler:
             if cur:
                 in_progress.add(cur)
 
-        recordings = []
+        # Rank plain (mtime, dir, name, size) tuples; only the requested
+        # page is turned into dicts
+        rows = []
         if channel is not None:
             dirs = [os.path.join(self.record_dir, f'ch{channel}')]
         else:
-            try:
-                dirs = sorted(
-                    os.path.join(self.record_dir, d)
-                    for d in os.listdir(self.record_dir)
-                    if os.path.isdir(os.path.join(self.record_dir, d))
-                    and d.startswith('ch'))
-            except FileNotFoundError:
-                dirs = []
-        
+            dirs = self._channel_dirs()
+
         for d in dirs:
-            ch_name = os.path.basename(d)
             try:
-                files = os.listdir(d)
+                files = self._scan_dir(d)
             except FileNotFoundError:
                 continue
-            for f in files:
-                if not f.endswith('.mp4'):
-                    continue
+            for f, size, mtime in files:
                 if date_filter and not f.startswith(date_filter):
                     continue
-                
-                fp = os.path.join(d, f)
-                if fp in in_progress:
-                    continue  # skip: moov not written yet
-                try:
-                    st = os.stat(fp)
-                except FileNotFoundError:
-                    continue
-                recordings.append({
-                    'channel': ch_name,
-                    'filename': f,
-                    'size': st.st_size,
-                    'modified': st.st_mtime,
-                    'uploaded': fp in self._uploaded,
-                })
-        
-        # Sort newest first
-        recordings.sort(key=lambda r: r['modified'], reverse=True)
-        
-        # Apply pagination
+                rows.append((mtime, d, f, size))
+
+        # Newest first, then paginate (in-progress files are dropped below,
+        # so rank enough extra rows to cover them)
+        newest = heapq.nlargest(offset + limit + len(in_progress), rows,
+                                key=lambda r: r[0])
+        recordings = []
+        for mtime, d, f, size in newest:
+            fp = os.path.join(d, f)
+            if fp in in_progress:
+                continue  # skip: still being written
+            recordings.append({
+                'channel': os.path.basename(d),
+                'filename': f,
+                'size': size,
+                'modified': mtime,
+                'uploaded': fp in self._uploaded,
+            })
         return recordings[offset : offset + limit]
 
-    def get_recording_dates(self):
-        """Return a sorted list of unique dates (YYYY-MM-DD) that have recordings."""
-        dates = set()
+    def _channel_dirs(self):
+        """Sorted paths of the ch* directories under record_dir."""
         try:
-            ch_dirs = [d for d in os.listdir(self.record_dir)
-                       if os.path.isdir(os.path.join(self.record_dir, d))
-                       and d.startswith('ch')]
+            with os.scandir(self.record_dir) as it:
+                return sorted(e.path for e in it
+                              if e.name.startswith('ch') and e.is_dir())
         except FileNotFoundError:
             return []
-            
-        for d in ch_dirs:
-            path = os.path.join(self.record_dir, d)
+
+    def get_recording_dates(self):
+        """Return a sorted list of unique dates (YYYY-MM-DD) that have recordings."""
+        dates = set()
+        for path in self._channel_dirs():
             try:
-                for f in os.listdir(path):
-                    if f.endswith('.mp4') and len(f) >= 10:
+                for f, _, _ in self._scan_dir(path):
+                    if len(f) >= 10:
                         # expected format: YYYY-MM-DD_HH-MM-SS.mp4
                         # simplistic check: grab first 10 chars
                         dates.add(f[:10])
@@ -350,7 +428,8 @@ class RecordingScheduler:
         if not os.path.isfile(filepath):
             raise FileNotFoundError(f'{channel}/{filename} not found')
         os.remove(filepath)
-        self._uploaded.discard(filepath)
+        with self._lock:
+            self._uploaded.discard(filepath)
         log.info('Deleted recording %s/%s', channel, filename)
         return True
 
@@ -368,6 +447,20 @@ class RecordingScheduler:
 
     # ── Recording loop ──────────────────────────────────
 
+    def _build_input_args(self, channel):
+        """ffmpeg input options: the RTSP source if set, else the feeder pipe."""
+        if self.record_source:
+            # RTSP socket I/O timeout (µs), so a stalled stream exits and
+            # the loop restarts it. ffmpeg < 5 calls it -stimeout; there
+            # -timeout is the listen timeout and switches on listen mode.
+            timeout_opt = '-stimeout' if _ffmpeg_major() < 5 else '-timeout'
+            return ['-rtsp_transport', 'tcp',
+                    timeout_opt, '5000000',
+                    '-i', self.record_source.replace('{channel}', str(channel))]
+        # Raw H.264 with no embedded timestamps — declare framerate and
+        # generate PTS so moov timestamps are valid.
+        return ['-fflags', '+genpts', '-r', '25', '-f', 'h264', '-i', 'pipe:0']
+
     def _record_loop(self, channel):
         """Continuous recording for one channel using ffmpeg segment muxer."""
         ch_dir = os.path.join(self.record_dir, f'ch{channel}')
@@ -386,56 +479,69 @@ class RecordingScheduler:
             self._status[channel]['started'] = datetime.now().isoformat()
 
             try:
-                feeder = subprocess.Popen(
-                    [sys.executable, self._feeder_script,
-                     '--channel', str(channel),
-                     '--stream-type', str(self.stream_type)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                )
+                feeder = None
+                if not self.record_source:
+                    feeder = subprocess.Popen(
+                        [sys.executable, self._feeder_script,
+                         '--channel', str(channel),
+                         '--stream-type', str(self.stream_type)],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL,
+                    )
                 ffmpeg = subprocess.Popen(
                     ['ffmpeg', '-y',
-                     # Input: raw H.264 with no embedded timestamps — declare
-                     # framerate and generate PTS so moov timestamps are valid.
-                     '-fflags', '+genpts',
-                     '-r', '25',
-                     '-f', 'h264', '-i', 'pipe:0',
+                     *self._build_input_args(channel),
                      '-c', 'copy',
-                     # Write moov atom at the start so completed segments are
-                     # immediately playable without re-muxing.
-                     '-movflags', '+faststart',
                      '-f', 'segment',
                      '-segment_time', str(seg_sec),
                      '-segment_format', 'mp4',
+                     # Fragmented MP4: the header goes out first and each
+                     # keyframe closes a fragment, so segments are playable
+                     # as written and nothing is rewritten at segment close
+                     # (+faststart re-copies the whole file to move moov).
+                     '-segment_format_options',
+                     'movflags=+frag_keyframe+empty_moov+default_base_moof',
                      '-strftime', '1',
                      '-reset_timestamps', '1',
                      pattern],
-                    stdin=feeder.stdout,
+                    stdin=feeder.stdout if feeder else subprocess.DEVNULL,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.DEVNULL,
                 )
-                feeder.stdout.close()  # allow SIGPIPE
+                if feeder:
+                    feeder.stdout.close()  # allow SIGPIPE
 
                 with self._lock:
                     self._processes[channel] = (feeder, ffmpeg)
 
                 log.info('Recording ch%d → %s (segment=%ds)', channel, ch_dir, seg_sec)
 
-                # Monitor until shutdown, schedule changes, or process dies
-                while self._running and self._is_scheduled_now():
-                    if ffmpeg.poll() is not None:
-                        break
-                    # Count completed segments
-                    self._status[channel]['segments'] = sum(
-                        1 for f in os.listdir(ch_dir) if f.endswith('.mp4'))
-                    time.sleep(10)
-
-                # Graceful stop: terminate feeder → pipe closes → ffmpeg finalizes
-                feeder.terminate()
+                # Monitor until shutdown, schedule changes, or process dies.
+                # With a pidfd the thread sleeps until ffmpeg exits (which
+                # stop() also causes) or the hour rolls over.
+                pidfd = _pidfd_open(ffmpeg.pid)
                 try:
-                    feeder.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    feeder.kill()
+                    while self._running and self._is_scheduled_now():
+                        if ffmpeg.poll() is not None:
+                            break
+                        if pidfd is None:
+                            time.sleep(10)
+                        else:
+                            select.select([pidfd], [], [], _until_next_hour())
+                finally:
+                    if pidfd is not None:
+                        os.close(pidfd)
+
+                # Graceful stop: terminate feeder → pipe closes → ffmpeg
+                # finalizes (an RTSP-fed ffmpeg finalizes on SIGTERM itself)
+                if feeder:
+                    feeder.terminate()
+                    try:
+                        feeder.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        feeder.kill()
+                else:
+                    ffmpeg.terminate()
                 try:
                     ffmpeg.wait(timeout=15)
                 except subprocess.TimeoutExpired:
@@ -458,73 +564,163 @@ class RecordingScheduler:
 
     # ── Upload loop ─────────────────────────────────────
 
-    def _upload_loop(self):
-        """Background worker: uploads completed segments."""
-        while self._running:
-            time.sleep(15)
+    def _upload_loop(self, pool):
+        """Background worker: queues completed segments on the upload pool."""
+        watch = self._watch_segments()
+        if watch is None:
+            # Poll: rescan every channel directory every 15 s
+            while self._running:
+                time.sleep(15)
+                try:
+                    if not self._queue_uploads(pool, dict(self._find_completed_segments())):
+                        return
+                except Exception as e:
+                    log.error('Upload worker error: %s', e)
+            return
+
+        # inotify: ffmpeg closes each segment once it is finished, so every
+        # CLOSE_WRITE is one ready file. Segments completed while nothing
+        # was watching come from a scan now and one more a minute later
+        # (the scan skips files written in the last 60 s).
+        ino, wds = watch
+        candidates = dict(self._find_completed_segments())
+        rescan_at = time.monotonic() + 61
+        try:
+            while self._running:
+                try:
+                    if rescan_at and time.monotonic() >= rescan_at:
+                        candidates.update(self._find_completed_segments())
+                        rescan_at = 0
+                    if not self._queue_uploads(pool, candidates):
+                        return
+                    for ev in ino.read(timeout=15000):
+                        if ev.mask & _inflags.Q_OVERFLOW:
+                            candidates.update(self._find_completed_segments())
+                        elif ev.wd in wds and ev.name.endswith('.mp4'):
+                            ch_dir, ch_name = wds[ev.wd]
+                            candidates[os.path.join(ch_dir, ev.name)] = ch_name
+                except Exception as e:
+                    log.error('Upload worker error: %s', e)
+                    time.sleep(15)
+        finally:
+            ino.close()
+
+    def _watch_segments(self):
+        """
+        Watch each channel directory for finished segments. Returns
+        (INotify, {wd: (ch_dir, ch_name)}), or None to fall back to polling.
+        """
+        if INotify is None:
+            return None
+        ino = None
+        try:
+            ino = INotify()
+            wds = {}
+            for ch in self.channels:
+                ch_name = f'ch{ch}'
+                ch_dir = os.path.join(self.record_dir, ch_name)
+                os.makedirs(ch_dir, exist_ok=True)
+                wds[ino.add_watch(ch_dir, _SEGMENT_EVENTS)] = (ch_dir, ch_name)
+        except OSError as e:
+            log.warning('inotify unavailable (%s), polling for segments', e)
+            if ino is not None:
+                ino.close()
+            return None
+        return ino, wds
+
+    def _queue_uploads(self, pool, candidates):
+        """
+        Submit each (filepath → ch_name) candidate that is not already
+        uploaded, queued or given up on; finished entries are removed from
+        *candidates*. Returns False once the pool has been shut down.
+        """
+        for filepath, ch_name in list(candidates.items()):
+            if not self._running:
+                break
+            if not os.path.exists(filepath):
+                del candidates[filepath]    # deleted by retention or by hand
+                continue
+            with self._lock:
+                if (filepath in self._uploaded
+                        or self._upload_failures.get(filepath, 0) >= 3):
+                    del candidates[filepath]    # done, or skip after 3 failures
+                    continue
+                if filepath in self._inflight:
+                    continue
+                self._inflight.add(filepath)
             try:
-                pending = self._find_completed_segments()
-                for filepath, ch_name in pending:
-                    if not self._running:
-                        break
-                    retries = self._upload_failures.get(filepath, 0)
-                    if retries >= 3:
-                        continue  # skip after 3 failures
-                    try:
-                        self._upload_one(filepath, ch_name)
-                        self._uploaded.add(filepath)
-                        self._upload_failures.pop(filepath, None)
-                        self._save_upload_state()
-                        if self.gdrive_delete_local:
-                            os.remove(filepath)
-                            log.info('Deleted local (after upload): %s', filepath)
-                    except Exception as e:
-                        self._upload_failures[filepath] = retries + 1
-                        log.error('Upload failed (%d/3) %s: %s',
-                                  retries + 1, os.path.basename(filepath), e)
-            except Exception as e:
-                log.error('Upload worker error: %s', e)
+                fut = pool.submit(self._upload_job, filepath, ch_name)
+            except RuntimeError:   # pool shut down by stop()
+                self._inflight.discard(filepath)
+                return False
+            fut.add_done_callback(
+                lambda _f, fp=filepath: self._inflight.discard(fp))
+        return True
+
+    def _upload_job(self, filepath, ch_name):
+        """Upload one segment on a pool thread and record the outcome."""
+        try:
+            self._upload_one(filepath, ch_name)
+        except Exception as e:
+            with self._lock:
+                retries = self._upload_failures.get(filepath, 0) + 1
+                self._upload_failures[filepath] = retries
+            log.error('Upload failed (%d/3) %s: %s',
+                      retries, os.path.basename(filepath), e)
+            return
+        with self._lock:
+            self._uploaded.add(filepath)
+            self._upload_failures.pop(filepath, None)
+            self._append_upload_state(filepath)
+        if self.gdrive_delete_local:
+            try:
+                os.remove(filepath)
+                log.info('Deleted local (after upload): %s', filepath)
+            except OSError as e:
+                log.error('Could not delete %s: %s', filepath, e)
 
     def _upload_one(self, filepath, ch_name):
         """Upload a single file via Google Drive API or custom command."""
         filename = os.path.basename(filepath)
         if self._uploader:
-            folder = self._uploader.ensure_subfolder(ch_name)
+            with self._folder_lock:   # one worker creates a missing folder
+                folder = self._uploader.ensure_subfolder(ch_name)
             self._uploader.upload(filepath, filename=filename, folder_id=folder)
         if self.upload_command:
-            cmd = self.upload_command.replace('{file}', filepath) \
-                                     .replace('{channel}', ch_name) \
-                                     .replace('{filename}', filename)
-            log.info('Running upload command: %s', cmd)
-            subprocess.run(cmd, shell=True, check=True, timeout=300)
+            # Plain commands are exec'd directly (no shell per file, and
+            # paths can't be misread as shell syntax); ones that use shell
+            # features still get a shell, with the values passed in the
+            # environment so they are never parsed as shell syntax.
+            if _needs_shell(self.upload_command):
+                cmd = _shell_placeholders(self.upload_command)
+                env = dict(os.environ, DVR_FILE=filepath, DVR_CHANNEL=ch_name,
+                           DVR_FILENAME=filename)
+                log.info('Running upload command: %s (%s)', cmd, filepath)
+                subprocess.run(cmd, shell=True, check=True, timeout=300, env=env)
+            else:
+                argv = [_fill_placeholders(arg, filepath, ch_name, filename)
+                        for arg in shlex.split(self.upload_command)]
+                log.info('Running upload command: %s', shlex.join(argv))
+                subprocess.run(argv, check=True, timeout=300)
 
     def _find_completed_segments(self):
         """Find MP4 files old enough to be complete and not yet uploaded."""
+        # Served from the _scan_dir cache, like get_recordings: one stat per
+        # channel directory instead of one per file. A cached mtime is at
+        # most _LISTING_TTL stale, well inside the min_age margin.
         now = time.time()
         min_age = 60  # seconds since last write
         completed = []
-        try:
-            entries = os.listdir(self.record_dir)
-        except FileNotFoundError:
-            return completed
-        for ch_dir_name in entries:
-            ch_dir = os.path.join(self.record_dir, ch_dir_name)
-            if not os.path.isdir(ch_dir) or not ch_dir_name.startswith('ch'):
-                continue
+        for ch_dir in self._channel_dirs():
+            ch_dir_name = os.path.basename(ch_dir)
             try:
-                files = os.listdir(ch_dir)
+                files = self._scan_dir(ch_dir)
             except FileNotFoundError:
                 continue
-            for f in files:
-                if not f.endswith('.mp4'):
-                    continue
+            for f, size, mtime in files:
                 fp = os.path.join(ch_dir, f)
-                try:
-                    st = os.stat(fp)
-                except FileNotFoundError:
-                    continue
-                if (now - st.st_mtime > min_age
-                        and st.st_size > 0
+                if (now - mtime > min_age
+                        and size > 0
                         and fp not in self._uploaded):
                     completed.append((fp, ch_dir_name))
         return completed
@@ -544,50 +740,179 @@ class RecordingScheduler:
             time.sleep(300)
             try:
                 cutoff = time.time() - (self.retention_hours * 3600)
-                for ch_dir_name in os.listdir(self.record_dir):
-                    ch_dir = os.path.join(self.record_dir, ch_dir_name)
-                    if not os.path.isdir(ch_dir):
+                for ch_dir in self._channel_dirs():
+                    # New segments are only ever younger, so nothing here
+                    # can have aged out until the cutoff passes the oldest
+                    # file the last sweep kept
+                    if self._oldest_mtime.get(ch_dir, 0) >= cutoff:
                         continue
-                    for f in os.listdir(ch_dir):
-                        if not f.endswith('.mp4'):
+                    ch_dir_name = os.path.basename(ch_dir)
+                    try:
+                        files = self._scan_dir(ch_dir)
+                    except FileNotFoundError:
+                        continue
+                    self._oldest_mtime[ch_dir] = min(
+                        (m for _, _, m in files if m >= cutoff), default=time.time())
+                    for f, _, mtime in files:
+                        if mtime >= cutoff:
                             continue
                         fp = os.path.join(ch_dir, f)
                         try:
-                            if os.path.getmtime(fp) < cutoff:
-                                os.remove(fp)
-                                self._uploaded.discard(fp)
-                                log.info('Cleanup: removed %s/%s', ch_dir_name, f)
+                            os.remove(fp)
                         except FileNotFoundError:
-                            pass
+                            continue
+                        with self._lock:
+                            self._uploaded.discard(fp)
+                        log.info('Cleanup: removed %s/%s', ch_dir_name, f)
             except Exception as e:
                 log.error('Cleanup error: %s', e)
 
     # ── Upload state persistence ────────────────────────
 
+    # One JSON-encoded path per line, appended as each upload finishes.
+    # Older versions rewrote a single sorted JSON list on every upload.
+    _STATE_FILE = '.upload_state.jsonl'
+    _LEGACY_STATE_FILE = '.upload_state.json'
+
     def _load_upload_state(self):
-        path = os.path.join(self.record_dir, '.upload_state.json')
+        """Read the upload log, then compact it to files still on disk."""
+        # Held across read + rewrite: upload jobs left over from a previous
+        # start() append under the same lock, so none of their lines can
+        # land in the file os.replace() is about to discard
+        with self._lock:
+            self._read_upload_state()
+            self._compact_upload_state()
+
+    def _read_upload_state(self):
+        """Set _uploaded from the log (or legacy list): files still on disk."""
+        path = os.path.join(self.record_dir, self._STATE_FILE)
+        uploaded = set()
         try:
             with open(path) as f:
-                self._uploaded = set(json.load(f))
-        except (FileNotFoundError, json.JSONDecodeError, TypeError):
-            self._uploaded = set()
+                for line in f:
+                    try:
+                        uploaded.add(json.loads(line))
+                    except ValueError:
+                        pass    # torn last line from a crash mid-append
+        except FileNotFoundError:
+            try:
+                with open(os.path.join(self.record_dir, self._LEGACY_STATE_FILE)) as f:
+                    uploaded = set(json.load(f))
+            except (OSError, ValueError, TypeError):
+                pass
+        except OSError:
+            pass
+        self._uploaded = {fp for fp in uploaded
+                          if isinstance(fp, str) and os.path.exists(fp)}
+
+    def _compact_upload_state(self):
+        """Rewrite the log from _uploaded via a temp file + rename (crash-safe)."""
+        path = os.path.join(self.record_dir, self._STATE_FILE)
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                f.writelines(json.dumps(fp) + '\n' for fp in self._uploaded)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.error('Could not write upload state: %s', e)
+            return
+        try:
+            os.remove(os.path.join(self.record_dir, self._LEGACY_STATE_FILE))
+        except OSError:
+            pass
 
-    def _save_upload_state(self):
-        path = os.path.join(self.record_dir, '.upload_state.json')
+    def _append_upload_state(self, filepath):
+        """Record one finished upload: a single appended line, O(1)."""
+        path = os.path.join(self.record_dir, self._STATE_FILE)
         try:
-            with open(path, 'w') as f:
-                json.dump(sorted(self._uploaded), f)
+            with open(path, 'a') as f:
+                f.write(json.dumps(filepath) + '\n')
         except OSError:
             pass
 
     # ── Helpers ─────────────────────────────────────────
 
     def _is_scheduled_now(self):
-        return datetime.now().hour in self.schedule_hours
+        return time.localtime().tm_hour in self.schedule_hours
 
 
 # ── Module-level helpers ────────────────────────────────
 
+def _fill_placeholders(template, file, channel, filename):
+    return (template.replace('{file}', file)
+                    .replace('{channel}', channel)
+                    .replace('{filename}', filename))
+
+
+def _needs_shell(command):
+    """True if *command* uses shell syntax and can't be exec'd directly."""
+    if _SHELL_META.search(command):
+        return True
+    first = command.split(None, 1)[0] if command.strip() else ''
+    return bool(_SHELL_ASSIGN.match(first)) or first in _SHELL_BUILTINS
+
+
+def _shell_placeholders(template):
+    """
+    Replace placeholders in a shell command with references to their
+    DVR_* environment variables, quoted to suit where each one sits:
+    {file}, "{file}" and '{file}' all expand to exactly one word.
+    """
+    out = []
+    quote = None    # None, '"' or "'"
+    i, n = 0, len(template)
+    while i < n:
+        m = _PLACEHOLDER_RE.match(template, i)
+        if m:
+            var = _PLACEHOLDER_VARS[m.group()]
+            if quote is None:
+                out.append(f'"${{{var}}}"')
+            elif quote == '"':
+                out.append(f'${{{var}}}')
+            else:   # step out of the single quotes to expand it
+                out.append(f"'\"${{{var}}}\"'")
+            i = m.end()
+            continue
+        c = template[i]
+        if c == '\\' and quote != "'":
+            out.append(template[i:i + 2])   # escaped char, quotes included
+            i += 2
+            continue
+        if quote is None and c in '"\'':
+            quote = c
+        elif c == quote:
+            quote = None
+        out.append(c)
+        i += 1
+    return ''.join(out)
+
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_major():
+    """ffmpeg's major version; unparsable (git builds) counts as current."""
+    try:
+        out = subprocess.run(['ffmpeg', '-version'], capture_output=True,
+                             text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return 99
+    m = re.match(r'ffmpeg version n?(\d+)\.', out)
+    return int(m.group(1)) if m else 99
+
+
+def _pidfd_open(pid):
+    """fd that turns readable when *pid* exits; None without pidfd support."""
+    try:
+        return os.pidfd_open(pid)   # Python 3.9+, Linux 5.3+
+    except (AttributeError, OSError):
+        return None
+
+
+def _until_next_hour():
+    """Seconds until just past the next hour (schedules are per hour), capped."""
+    now = time.localtime()
+    return min(3601 - (now.tm_min * 60 + now.tm_sec), 300)
+
+
 def _env_bool(key, default=False):
     return os.environ.get(key, str(default)).lower() in ('true', '1', 'yes')
 
@@ -12,11 +12,17 @@ followed by standard H.264 NAL units with 4-byte start codes.
 import struct
 import logging
 
-from .protocol import MEDIA_MAGIC
+from .protocol import MEDIA_MAGIC, HEADER_SIZE
 
 log = logging.getLogger(__name__)
 
 SUB_HEADER_SIZE = 44
+RECV_BUFFER_SIZE = 256 * 1024   # one reusable receive buffer per stream
+
+_U32 = struct.Struct('>I')
+_MAGIC_BYTES = _U32.pack(MEDIA_MAGIC)
+_FRAME_MIN = HEADER_SIZE + SUB_HEADER_SIZE   # 80: header + sub-header
+_START_CODE = b'\x00\x00\x00\x01'
 
 
 def extract_h264(payload):
@@ -52,18 +58,25 @@ def iter_frames(sock, timeout=5):
 
     Raises StopIteration when the socket closes or times out repeatedly.
     """
-    buf = b''
+    buf = bytearray()
+    pos = 0         # start of the unparsed data in buf
     consecutive_timeouts = 0
     max_timeouts = 3
 
+    # Receive into one preallocated buffer instead of allocating a new
+    # bytes object per recv(), and set the timeout once rather than
+    # paying an extra syscall on every read.
+    rbuf = bytearray(RECV_BUFFER_SIZE)
+    rview = memoryview(rbuf)
+    sock.settimeout(timeout)
+
     while True:
         try:
-            sock.settimeout(timeout)
-            chunk = sock.recv(65536)
-            if not chunk:
+            n = sock.recv_into(rbuf)
+            if not n:
                 log.info("Media socket closed")
                 return
-            buf += chunk
+            buf += rview[:n]
             consecutive_timeouts = 0
         except Exception:
             consecutive_timeouts += 1
@@ -72,29 +85,40 @@ def iter_frames(sock, timeout=5):
                 return
             continue
 
-        # Parse complete frames from buffer
-        while len(buf) >= 80:  # 36 header + 44 sub-header minimum
-            magic = struct.unpack('>I', buf[:4])[0]
-            if magic != MEDIA_MAGIC:
-                buf = buf[1:]
+        # Parse complete frames by offset; the consumed prefix is dropped
+        # once per recv instead of re-slicing the buffer per frame
+        while len(buf) - pos >= _FRAME_MIN:
+            if _U32.unpack_from(buf, pos)[0] != MEDIA_MAGIC:
+                # Resync on the next header magic
+                nxt = buf.find(_MAGIC_BYTES, pos + 1)
+                if nxt < 0:
+                    pos = max(pos, len(buf) - 3)   # keep a possible partial magic
+                    break
+                pos = nxt
                 continue
 
-            hdr = struct.unpack('>IIIIIIIII', buf[:36])
-            payload_size = hdr[3]
-            total = 36 + SUB_HEADER_SIZE + payload_size
+            payload_size = _U32.unpack_from(buf, pos + 12)[0]   # header field 3
+            end = pos + _FRAME_MIN + payload_size
 
-            if len(buf) < total:
+            if len(buf) < end:
                 break  # Need more data
 
             if payload_size > 0:
-                payload = buf[80:80 + payload_size]
-
                 # Parse sub-header for frame type (codec)
                 # at offset 36+32 = 68: 4 bytes codec type (3 = H.264)
-                codec = struct.unpack('>I', buf[68:72])[0] if len(buf) >= 72 else 0
-
-                h264 = extract_h264(payload)
+                codec = _U32.unpack_from(buf, pos + 68)[0]
+
+                # Common case: copy once, from the first 4-byte start code
+                idx = buf.find(_START_CODE, pos + _FRAME_MIN, end)
+                if idx >= 0:
+                    h264 = memoryview(buf)[idx:end].tobytes()
+                else:
+                    h264 = extract_h264(bytes(buf[pos + _FRAME_MIN:end]))
                 if h264:
                     yield codec, h264
 
-            buf = buf[total:]
+            pos = end
+
+        if pos:
+            del buf[:pos]
+            pos = 0
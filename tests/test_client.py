@@ -0,0 +1,83 @@
+"""Tests for hieasy_dvr.client.DVRClient's command-connection reader."""
+
+import socket
+import threading
+import time
+import unittest
+
+from hieasy_dvr.client import DVRClient
+from hieasy_dvr.protocol import (ID_HEARTBEAT, MsgReader, make_xml,
+                                 pack_cmd_header, recv_msg, parse_body)
+
+
+def _send(sock, inner, cmd_id=1, txn=None):
+    body = make_xml(cmd_id, inner)
+    sock.sendall(pack_cmd_header(len(body), txn) + body)
+
+
+class ReaderTest(unittest.TestCase):
+
+    def _attach(self, client):
+        """Give *client* a socketpair command connection and start its reader."""
+        ours, dvr = socket.socketpair()
+        self.addCleanup(dvr.close)
+        client._cmd_sock = ours
+        client._cmd_reader = MsgReader(ours)
+        client._start_reader()
+        return dvr
+
+    def test_wait_for_and_heartbeat(self):
+        c = DVRClient('x')
+        dvr = self._attach(c)
+        self.addCleanup(c.disconnect)
+        _send(dvr, '<HeartBeatNotice />', ID_HEARTBEAT, txn=42)
+        _send(dvr, '<RealStreamCreateReply MediaSession="7" />')
+        _, reply = c._wait_for('RealStreamCreateReply', timeout=3)
+        self.assertIn('MediaSession="7"', reply)
+        hdr, body = recv_msg(dvr, timeout=3)
+        self.assertEqual(hdr[2], 42)
+        self.assertIn('HeartBeat', parse_body(body))
+
+    def test_disconnect_stops_reader_before_reconnect(self):
+        c = DVRClient('x')
+        self._attach(c)
+        old_thread = c._reader[0]
+        c.disconnect()
+        self.assertFalse(old_thread.is_alive())
+
+        # Immediate reconnect: only the new reader reads the new stream
+        dvr = self._attach(c)
+        self.addCleanup(c.disconnect)
+        for i in range(50):
+            _send(dvr, f'<Notice n="{i}" />')
+        _send(dvr, '<RealStreamStartReply />')
+        _, reply = c._wait_for('RealStreamStartReply', timeout=3)
+        self.assertIsNotNone(reply)
+        self.assertEqual(len(c._msgs), 50)
+
+    def test_concurrent_waits_for_same_tag(self):
+        c = DVRClient('x')
+        dvr = self._attach(c)
+        self.addCleanup(c.disconnect)
+        got = []
+
+        def wait():
+            got.append(c._wait_for('RealStreamCreateReply', timeout=3)[1])
+
+        threads = [threading.Thread(target=wait) for _ in range(2)]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + 3
+        while len(c._waiters) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        _send(dvr, '<RealStreamCreateReply MediaSession="1" />')
+        _send(dvr, '<RealStreamCreateReply MediaSession="2" />')
+        for t in threads:
+            t.join(5)
+        self.assertEqual(sorted('MediaSession="1"' in r for r in got),
+                         [False, True])
+        self.assertEqual(c._waiters, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Tests for DVRConfigClient's pipelined GetCfg requests."""
+
+import re
+import socket
+import threading
+import unittest
+from unittest import mock
+
+from hieasy_dvr import config
+from hieasy_dvr.config import CONFIG_TYPES, DVRConfigClient
+from hieasy_dvr.protocol import make_xml, pack_cmd_header, parse_body, recv_msg
+
+
+def _reply(sock, txn, mc):
+    body = make_xml(15, f'<GetCfgReply CmdReply="0"><CfgInfo MainCommand="{mc}" '
+                        f'AssistCommand="-1"/><X v="{mc}"/></GetCfgReply>')
+    sock.sendall(pack_cmd_header(len(body), txn) + body)
+
+
+def _read_request(sock):
+    hdr, body = recv_msg(sock, 5)
+    if hdr is None:
+        return None, None
+    m = re.search(r'MainCmd="(\d+)"', parse_body(body))
+    return hdr[2], int(m.group(1)) if m else None
+
+
+class _FakeDVR:
+    """Serves GetCfg on one end of a socketpair from a background thread."""
+
+    def __init__(self, test, serve, *args):
+        self.client_sock, self.sock = socket.socketpair()
+        test.addCleanup(self.sock.close)
+        test.addCleanup(self.client_sock.close)
+        self.requests = []
+        self.heartbeat_replies = 0
+        self.thread = threading.Thread(target=serve, args=(self,) + args,
+                                       daemon=True)
+        self.thread.start()
+
+    def pipelined(self, echo_txn):
+        """Read every request first, then answer in reverse order after a
+        heartbeat, with or without the request's txn."""
+        while len(self.requests) < len(CONFIG_TYPES):
+            self.requests.append(_read_request(self.sock))
+        hb = make_xml(78, '<HeartBeatNotice />')
+        self.sock.sendall(pack_cmd_header(len(hb)) + hb)
+        for txn, mc in reversed(self.requests):
+            _reply(self.sock, txn if echo_txn else 1, mc)
+        hdr, body = recv_msg(self.sock, 5)
+        if hdr is not None and b'HeartBeatNoticeReply' in body:
+            self.heartbeat_replies += 1
+
+    def stalls(self):
+        """Answer the first of several queued requests, then nothing (like
+        firmware that drops pipelined commands)."""
+        txn, mc = _read_request(self.sock)
+        _reply(self.sock, txn, mc)
+        try:
+            while self.sock.recv(65536):
+                pass
+        except OSError:
+            pass
+
+    def sequential(self):
+        """Answer each request as it arrives."""
+        while True:
+            try:
+                txn, mc = _read_request(self.sock)
+            except OSError:
+                return
+            if txn is None:
+                return
+            self.requests.append((txn, mc))
+            _reply(self.sock, txn, mc)
+
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(config, '_pipeline_ok', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, dvr):
+        c = DVRConfigClient('x')
+        c._sock = dvr.client_sock
+        return c
+
+    def _check(self, results):
+        self.assertEqual(set(results), set(CONFIG_TYPES))
+        for mc, cfg in results.items():
+            self.assertEqual(cfg['data']['X']['v'], str(mc))
+            self.assertEqual(cfg['type_name'], CONFIG_TYPES[mc]['name'])
+
+    def test_replies_matched_by_txn(self):
+        dvr = _FakeDVR(self, _FakeDVR.pipelined, True)
+        self._check(self._client(dvr).get_all_configs())
+        dvr.thread.join(5)
+        self.assertEqual(dvr.heartbeat_replies, 1)
+        self.assertTrue(config._pipeline_ok)
+
+    def test_replies_matched_by_main_command(self):
+        dvr = _FakeDVR(self, _FakeDVR.pipelined, False)
+        self._check(self._client(dvr).get_all_configs())
+
+    def test_falls_back_to_sequential_for_good(self):
+        first = _FakeDVR(self, _FakeDVR.stalls)
+        c = self._client(first)
+        later = []
+
+        def connect():
+            dvr = _FakeDVR(self, _FakeDVR.sequential)
+            later.append(dvr)
+            c._sock = dvr.client_sock
+
+        with mock.patch.object(config, '_PIPELINE_REPLY_TIMEOUT', 0.2), \
+             mock.patch.object(c, 'connect', connect):
+            self._check(c.get_all_configs())
+            self.assertFalse(config._pipeline_ok)
+            self.assertEqual(len(later), 1)   # one reconnect, then sequential
+            # Later calls skip the pipeline: no failure, no reconnect
+            self._check(c.get_all_configs())
+        self.assertEqual(len(later), 1)
+        self.assertEqual(len(later[0].requests), 2 * len(CONFIG_TYPES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Tests for the resumable upload loop in hieasy_dvr.gdrive."""
+
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from hieasy_dvr import gdrive
+
+SESSION = 'https://upload.example/session'
+
+
+class _StubPool:
+    """Stands in for _HTTPSPool: replays scripted (status, headers, body)
+    replies, or raises a scripted exception, and records each request."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls  = []
+
+    def request(self, method, url, body=None, headers=None, timeout=30):
+        self.calls.append((method, (headers or {}).get('Content-Range'),
+                           len(body or b''), timeout))
+        reply = self.script.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def _committed(n):
+    # Drive leaves out the Range header until it has stored something
+    return (308, {'Range': f'bytes=0-{n - 1}'} if n else {}, b'')
+
+
+class ResumableUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp(prefix='dvr-gd-')
+        self.path = os.path.join(tmp, 'seg.mp4')
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * (10 * 1024 * 1024))     # two chunks
+        self.up = gdrive.OAuthDriveUploader(os.path.join(tmp, 'token.json'))
+        self.up._token = {'access_token': 't', 'refresh_token': 'r',
+                          'expires_at': time.time() + 3600}
+        patcher = mock.patch.object(gdrive, '_backoff')
+        self.backoff = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self, script):
+        init = (200, {'Location': SESSION}, b'')
+        self.up._http = pool = _StubPool([init] + script)
+        return self.up.upload(self.path), pool.calls[1:]
+
+    def test_resumes_after_503_and_reset(self):
+        first = 8 * 1024 * 1024
+        file_id, calls = self._upload([
+            (503, {}, b'busy'),                 # chunk 1 fails
+            _committed(0),                      # status query: nothing stored
+            _committed(first),                  # chunk 1 again
+            ConnectionResetError(),             # chunk 2 drops
+            _committed(first),                  # status query
+            (200, {}, json.dumps({'id': 'F'}).encode()),
+        ])
+        self.assertEqual(file_id, 'F')
+        size = os.path.getsize(self.path)
+        self.assertEqual([c[1] for c in calls], [
+            f'bytes 0-{first - 1}/{size}', f'bytes */{size}',
+            f'bytes 0-{first - 1}/{size}',
+            f'bytes {first}-{size - 1}/{size}', f'bytes */{size}',
+            f'bytes {first}-{size - 1}/{size}',
+        ])
+        self.assertEqual(self.backoff.call_count, 2)
+        # The PUT timeout grows with the chunk size
+        self.assertGreater(calls[0][3], calls[1][3])
+
+    def test_gives_up_when_no_progress(self):
+        # Every chunk fails and every status query answers 308 with no
+        # progress: the retry budget must run out instead of looping
+        script = [(503, {}, b'busy'), _committed(0)] * (gdrive._MAX_RETRIES + 1)
+        with self.assertRaises(gdrive.urllib.error.HTTPError):
+            self._upload(script)
+        self.assertEqual(self.backoff.call_count, gdrive._MAX_RETRIES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Tests for command-message reading and media-frame parsing."""
+
+import socket
+import struct
+import unittest
+
+from hieasy_dvr.protocol import (HEADER_STRUCT, MEDIA_MAGIC, MsgReader,
+                                 make_xml, pack_cmd_header, parse_body)
+from hieasy_dvr.stream import iter_frames
+
+H264 = b'\x00\x00\x00\x01\x67\x42\x00\x1e'
+
+
+def _frame(payload, codec=3):
+    """One media frame: header, sub-header (codec at offset 32), payload."""
+    sub = bytearray(44)
+    struct.pack_into('>I', sub, 32, codec)
+    return (HEADER_STRUCT.pack(MEDIA_MAGIC, 0, 0, len(payload), 0, 0, 0, 0, 0)
+            + bytes(sub) + payload)
+
+
+def _msg(inner, txn=None):
+    body = make_xml(1, inner)
+    return pack_cmd_header(len(body), txn) + body
+
+
+class IterFramesTest(unittest.TestCase):
+
+    def _frames(self, data, step=7):
+        a, b = socket.socketpair()
+        self.addCleanup(a.close)
+        with b:
+            for i in range(0, len(data), step):   # split across many recvs
+                b.sendall(data[i:i + step])
+        return list(iter_frames(a, timeout=1))
+
+    def test_resyncs_on_garbage(self):
+        vendor = b'\x00\x00\x01\xc7' + bytes(18)
+        data = (b'junk' + _frame(vendor + H264)
+                + b'\x05\x01\x11' + b'more junk'   # partial magic, then noise
+                + _frame(H264 + b'\x65\x88', codec=4)
+                + _frame(b''))                     # empty payload: skipped
+        self.assertEqual(self._frames(data),
+                         [(3, H264), (4, H264 + b'\x65\x88')])
+
+    def test_magic_split_across_reads(self):
+        data = b'x' * 5 + _frame(H264)
+        for step in (1, 3, 6, len(data)):
+            self.assertEqual(self._frames(data, step), [(3, H264)], step)
+
+
+class MsgReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.a, self.b = socket.socketpair()
+        self.addCleanup(self.a.close)
+        self.addCleanup(self.b.close)
+        self.reader = MsgReader(self.a)
+
+    def test_several_messages_in_one_read(self):
+        self.b.sendall(_msg('<One />', txn=5) + _msg('<Two />', txn=6))
+        hdr, body = self.reader.recv_msg(timeout=1)
+        self.assertEqual(hdr[2], 5)
+        self.assertIn('<One />', parse_body(body))
+        hdr, body = self.reader.recv_msg(timeout=1)
+        self.assertEqual(hdr[2], 6)
+        self.assertIn('<Two />', parse_body(body))
+
+    def test_partial_message_kept_across_timeout(self):
+        data = _msg('<Reply Value="1" />', txn=9)
+        self.b.sendall(data[:20])            # part of the header
+        with self.assertRaises(socket.timeout):
+            self.reader.recv_msg(timeout=0.1)
+        self.b.sendall(data[20:50])          # rest of header, part of body
+        with self.assertRaises(socket.timeout):
+            self.reader.recv_msg(timeout=0.1)
+        self.b.sendall(data[50:])
+        hdr, body = self.reader.recv_msg(timeout=1)
+        self.assertEqual(hdr[2], 9)
+        self.assertIn('Value="1"', parse_body(body))
+
+    def test_peer_closed(self):
+        self.b.close()
+        self.assertEqual(self.reader.recv_msg(timeout=1), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
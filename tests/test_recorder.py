@@ -0,0 +1,113 @@
+"""Tests for hieasy_dvr.recorder."""
+
+import os
+import shlex
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from hieasy_dvr import recorder
+
+
+FILEPATH = '/rec/ch0/a b;$(x).mp4'   # spaces and shell syntax in the name
+FILENAME = 'a b;$(x).mp4'
+
+
+class UploadCommandTest(unittest.TestCase):
+
+    def _scheduler(self, command):
+        r = recorder.RecordingScheduler()
+        r.upload_command = command
+        return r
+
+    def test_exec_branch_quoted_and_unquoted(self):
+        r = self._scheduler('rclone copy "{file}" {file} \'{filename}\' '
+                            'gdrive:DVR/{channel}/')
+        with mock.patch.object(recorder.subprocess, 'run') as run:
+            r._upload_one(FILEPATH, 'ch0')
+        argv = run.call_args.args[0]
+        self.assertNotIn('shell', run.call_args.kwargs)
+        self.assertEqual(argv, ['rclone', 'copy', FILEPATH, FILEPATH,
+                                FILENAME, 'gdrive:DVR/ch0/'])
+
+    def test_shell_branch_quoted_and_unquoted(self):
+        with tempfile.TemporaryDirectory() as d:
+            out = os.path.join(d, 'out')
+            r = self._scheduler(
+                "printf '%s\\n' {file} \"{file}\" '{file}' "
+                "\"dir/{channel}/{filename}\" 'x{channel}y' "
+                f"> {shlex.quote(out)} && echo done >> {shlex.quote(out)}")
+            r._upload_one(FILEPATH, 'ch0')
+            with open(out) as f:
+                lines = f.read().splitlines()
+        self.assertEqual(lines, [FILEPATH, FILEPATH, FILEPATH,
+                                 f'dir/ch0/{FILENAME}', 'xch0y', 'done'])
+
+    def test_needs_shell(self):
+        for cmd in ('rclone copy {file} gdrive:# comment',
+                    'RCLONE_CONFIG=/etc/rclone.conf rclone copy {file} x:',
+                    'cd /tmp', '. ./upload.env', 'source env', 'export X=1',
+                    'rclone copy {file} x: > log', 'rclone copy {file} x:*'):
+            self.assertTrue(recorder._needs_shell(cmd), cmd)
+        for cmd in ('rclone copy "{file}" gdrive:DVR/{channel}/',
+                    'scp {file} host:/dvr/', 'cdrecord {file}', ''):
+            self.assertFalse(recorder._needs_shell(cmd), cmd)
+
+    def test_env_assignment_runs_in_shell(self):
+        r = self._scheduler('RCLONE_CONFIG=/etc/rc.conf rclone copy {file} x:')
+        with mock.patch.object(recorder.subprocess, 'run') as run:
+            r._upload_one(FILEPATH, 'ch0')
+        self.assertEqual(run.call_args.args[0],
+                         'RCLONE_CONFIG=/etc/rc.conf rclone copy "${DVR_FILE}" x:')
+        self.assertTrue(run.call_args.kwargs['shell'])
+        self.assertEqual(run.call_args.kwargs['env']['DVR_FILE'], FILEPATH)
+
+    def test_shell_placeholders(self):
+        cases = [
+            ('up {file}', 'up "${DVR_FILE}"'),
+            ('up "{file}"', 'up "${DVR_FILE}"'),
+            ("up '{file}'", "up ''\"${DVR_FILE}\"''"),
+            ('cp {file} "d/{channel}/{filename}"',
+             'cp "${DVR_FILE}" "d/${DVR_CHANNEL}/${DVR_FILENAME}"'),
+            ("echo 'it\\' {file}", "echo 'it\\' \"${DVR_FILE}\""),
+            ('echo \\{file}', 'echo \\{file}'),     # escaped brace: literal
+            ('echo {other}', 'echo {other}'),
+        ]
+        for template, want in cases:
+            self.assertEqual(recorder._shell_placeholders(template), want,
+                             template)
+
+    def test_shell_placeholders_keep_escapes(self):
+        self.assertEqual(recorder._shell_placeholders(r'echo \"{file} && x'),
+                         r'echo \""${DVR_FILE}" && x')
+
+
+class UploadStateTest(unittest.TestCase):
+
+    def test_compaction_keeps_concurrent_appends(self):
+        with tempfile.TemporaryDirectory() as d:
+            r = recorder.RecordingScheduler()
+            r.record_dir = d
+            paths = [os.path.join(d, f'{i}.mp4') for i in range(300)]
+            for fp in paths:
+                open(fp, 'w').close()
+            r._load_upload_state()
+
+            def finish_uploads():   # like _upload_job on a leftover worker
+                for fp in paths:
+                    with r._lock:
+                        r._uploaded.add(fp)
+                        r._append_upload_state(fp)
+
+            worker = threading.Thread(target=finish_uploads)
+            worker.start()
+            while worker.is_alive():
+                r._load_upload_state()     # start() after a quick stop()
+            worker.join()
+            r._load_upload_state()
+            self.assertEqual(r._uploaded, set(paths))
+
+
+if __name__ == '__main__':
+    unittest.main()
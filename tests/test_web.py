@@ -0,0 +1,253 @@
+"""Tests for dvr_web (HTTP server, Range parsing, config cache)."""
+
+import os
+import http.client
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from unittest import mock
+
+os.environ.setdefault('DVR_RECORD_DIR', tempfile.mkdtemp(prefix='dvr-rec-'))
+
+import dvr_web   # noqa: E402  (env must be set before import)
+
+
+def _connect(test, workers=1):
+    """Start a PooledHTTPServer for *test*; returns a keep-alive connection."""
+    srv = dvr_web.PooledHTTPServer(('127.0.0.1', 0), dvr_web.DVRHandler,
+                                   workers=workers)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    test.addCleanup(srv.server_close)
+    test.addCleanup(srv.shutdown)
+    conn = http.client.HTTPConnection('127.0.0.1', srv.server_address[1],
+                                      timeout=5)
+    test.addCleanup(conn.close)
+    return conn
+
+
+def _get(conn, path, headers=None):
+    conn.request('GET', path, headers=headers or {})
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+class PooledServerTest(unittest.TestCase):
+
+    def test_idle_keepalive_timeout_is_short(self):
+        self.assertLessEqual(dvr_web.DVRHandler.timeout, 5)
+
+    def test_serves_new_request_when_idle_connections_fill_pool(self):
+        workers = 2
+        with mock.patch.object(dvr_web.DVRHandler, 'timeout', 0.5):
+            srv = dvr_web.PooledHTTPServer(('127.0.0.1', 0), dvr_web.DVRHandler,
+                                           workers=workers)
+            threading.Thread(target=srv.serve_forever, daemon=True).start()
+            self.addCleanup(srv.server_close)
+            self.addCleanup(srv.shutdown)
+            port = srv.server_address[1]
+            idle = [socket.create_connection(('127.0.0.1', port))
+                    for _ in range(workers + 2)]
+            self.addCleanup(lambda: [s.close() for s in idle])
+            t0 = time.monotonic()
+            url = f'http://127.0.0.1:{port}/favicon.ico'
+            with urllib.request.urlopen(url, timeout=10) as r:
+                self.assertEqual(r.status, 204)
+            self.assertLess(time.monotonic() - t0, 5)
+
+    def test_delete_body_does_not_desync_keepalive(self):
+        conn = _connect(self)
+        conn.request('DELETE', '/api/nowhere', body=b'GET /x HTTP/1.1\r\n\r\n')
+        resp = conn.getresponse()
+        resp.read()
+        self.assertEqual(resp.status, 404)
+        resp, _ = _get(conn, '/favicon.ico')   # same connection
+        self.assertEqual(resp.status, 204)
+
+
+class RangeTest(unittest.TestCase):
+
+    def test_parse_range(self):
+        cases = [
+            (None, None),
+            ('bytes=0-9', (0, 9)),
+            ('bytes=90-', (90, 99)),
+            ('bytes=90-500', (90, 99)),        # end clamped to the file
+            ('bytes=-10', (90, 99)),           # suffix: last 10 bytes
+            ('bytes=-500', (0, 99)),
+            ('bytes=100-', False),             # starts past the end
+            ('bytes=-0', False),
+            ('bytes=5-3', None),               # reversed: ignore the header
+            ('bytes=0-1,5-6', None),           # multiple ranges: whole file
+            ('items=0-1', None),
+            ('bytes=-', None),
+        ]
+        for header, want in cases:
+            self.assertEqual(dvr_web._parse_range(header, 100), want, header)
+        self.assertIs(dvr_web._parse_range('bytes=-5', 0), False)
+
+    def test_download_ranges(self):
+        ch_dir = os.path.join(dvr_web._recorder.record_dir, 'ch0')
+        os.makedirs(ch_dir, exist_ok=True)
+        data = bytes(range(256)) * 4
+        with open(os.path.join(ch_dir, 'clip.mp4'), 'wb') as f:
+            f.write(data)
+        conn = _connect(self)
+        path = '/api/recordings/download/ch0/clip.mp4'
+
+        resp, body = _get(conn, path, {'Range': 'bytes=10-19'})
+        self.assertEqual(resp.status, 206)
+        self.assertEqual(resp.getheader('Content-Range'), 'bytes 10-19/1024')
+        self.assertEqual(body, data[10:20])
+
+        resp, body = _get(conn, path, {'Range': 'bytes=2000-'})
+        self.assertEqual(resp.status, 416)
+        self.assertEqual(resp.getheader('Content-Range'), 'bytes */1024')
+        self.assertEqual(body, b'')
+
+        resp, body = _get(conn, path, {'Range': 'bytes=19-10'})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(body, data)
+
+
+class _FakeConfigClient:
+    """Pooled-client stand-in: counts get_config() calls, or fails them."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def get_config(self, mc):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {'main_cmd': mc, 'data': {'n': self.calls}}
+
+
+class ConfigCacheTest(unittest.TestCase):
+
+    MC = 111
+
+    def setUp(self):
+        self.client = _FakeConfigClient()
+        self.jobs = []      # background refreshes, run by the test
+        for patcher in (
+                mock.patch.dict(dvr_web._config_cache, clear=True),
+                mock.patch.dict(dvr_web._config_errors, clear=True),
+                mock.patch.object(dvr_web, '_refreshing', set()),
+                mock.patch.object(dvr_web, '_acquire_client',
+                                  return_value=self.client),
+                mock.patch.object(dvr_web, '_release_client'),
+                mock.patch.object(dvr_web, '_save_disk_cache'),
+                mock.patch.object(dvr_web, '_load_disk_cache',
+                                  return_value=None),
+                mock.patch.object(dvr_web._refresh_executor, 'submit',
+                                  lambda fn, *a: self.jobs.append((fn, a)))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _age(self, seconds):
+        """Make the cached entry *seconds* older."""
+        entry = dvr_web._config_cache[self.MC]
+        dvr_web._config_cache[self.MC] = entry[:4] + (entry[4] - seconds,)
+
+    def test_fresh_entry_served_from_memory(self):
+        first = dvr_web._get_config(self.MC)
+        self.assertIs(dvr_web._get_config(self.MC), first)
+        self.assertEqual(self.client.calls, 1)
+
+    def test_stale_while_revalidate(self):
+        dvr_web._get_config(self.MC)
+        self._age(dvr_web._CACHE_TTLS[self.MC] + 1)
+        # Expired: the old copy comes back at once, one refresh is queued
+        self.assertEqual(dvr_web._get_config(self.MC)['data']['n'], 1)
+        self.assertEqual(dvr_web._get_config(self.MC)['data']['n'], 1)
+        self.assertEqual(len(self.jobs), 1)
+        self.assertEqual(self.client.calls, 1)
+        fn, args = self.jobs.pop()
+        fn(*args)
+        self.assertEqual(dvr_web._get_config(self.MC)['data']['n'], 2)
+        self.assertEqual(dvr_web._refreshing, set())
+
+    def test_too_stale_entry_refetched_inline(self):
+        dvr_web._get_config(self.MC)
+        self._age(dvr_web._CACHE_TTLS[self.MC] + dvr_web._STALE_TTL + 1)
+        self.assertEqual(dvr_web._get_config(self.MC)['data']['n'], 2)
+        self.assertEqual(self.jobs, [])
+
+    def test_negative_cache(self):
+        self.client.error = ConnectionResetError('gone')
+        with self.assertRaises(OSError):
+            dvr_web._get_config(self.MC)
+        calls = self.client.calls        # the dead connection is retried once
+        with self.assertRaisesRegex(RuntimeError, 'gone'):
+            dvr_web._get_config(self.MC)
+        self.assertEqual(self.client.calls, calls)
+        # Once _ERROR_TTL has passed the DVR is asked again
+        msg, ts = dvr_web._config_errors[self.MC]
+        dvr_web._config_errors[self.MC] = (msg, ts - dvr_web._ERROR_TTL - 1)
+        self.client.error = None
+        self.assertIn('data', dvr_web._get_config(self.MC))
+        self.assertNotIn(self.MC, dvr_web._config_errors)
+
+    def test_etag_not_modified(self):
+        conn = _connect(self)
+        path = f'/api/config/{self.MC}'
+        resp, body = _get(conn, path)
+        self.assertEqual(resp.status, 200)
+        etag = resp.getheader('ETag')
+        self.assertTrue(etag)
+        resp, body = _get(conn, path, {'If-None-Match': etag})
+        self.assertEqual(resp.status, 304)
+        self.assertEqual(body, b'')
+        resp, body = _get(conn, path, {'If-None-Match': f'"other", W/{etag}'})
+        self.assertEqual(resp.status, 304)
+        resp, _ = _get(conn, path, {'If-None-Match': '"other"'})
+        self.assertEqual(resp.status, 200)
+        # ?pretty=1 is a different representation with its own tag
+        resp, _ = _get(conn, path + '?pretty=1', {'If-None-Match': etag})
+        self.assertEqual(resp.status, 200)
+        self.assertNotEqual(resp.getheader('ETag'), etag)
+        self.assertEqual(self.client.calls, 1)
+
+
+class ConnectProbeTest(unittest.TestCase):
+
+    def test_concurrent_connect_failures_share_one_scan(self):
+        calls = []
+
+        def discover(**kw):
+            calls.append(kw)
+            time.sleep(0.2)
+            return []
+
+        errors = []
+
+        def connect():
+            try:
+                dvr_web._connect_client()
+            except OSError as e:
+                errors.append(e)
+
+        with mock.patch.object(dvr_web, '_probe_last', None), \
+             mock.patch.object(dvr_web._discover_mod, 'discover', discover), \
+             mock.patch.object(dvr_web.DVRConfigClient, 'connect',
+                               side_effect=ConnectionRefusedError):
+            threads = [threading.Thread(target=connect) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(len(errors), 4)
+            self.assertEqual(dvr_web._probe_last[0], [])
+            # A failure right after reuses the scan's answer
+            connect()
+            self.assertEqual(len(calls), 1)
+
+
+
+if __name__ == '__main__':
+    unittest.main()